@@ -9,30 +9,502 @@ __author__  = 'xyLotus'
 # ===================================
 # Imports
 # ===================================
-from tokenization.Tokenizer import TokenType, Tokenizer, Token
+from tokenization.Tokenizer import Tokenizer
 from tokenization.AstroFile import AstroFile
+from tokenization.Symbols import SymbolTable
 from parse.parser import Parser
-from parse.ast import *
+from parse.optimize import Optimizer
+from driver import CompileResult, collect_sources, compile_many, summarize
+from profiling import PhaseProfiler, PROFILE_FORMATS, count_nodes, counted
+from contextlib import nullcontext
 from utils import colored_out as asxout
 from utils import ColorFormat as Coloring
+from utils import use_colors
+import argparse
+import time
 import sys
+import os
+
+
+def _help_formatter(prog: str) -> argparse.HelpFormatter:
+    '''argparse's default formatter imports shutil just to size the help
+    text, which is a noticeable part of the startup time.'''
+    try:
+        width = os.get_terminal_size().columns - 2
+    except OSError:
+        width = 78
+    return argparse.HelpFormatter(prog, width=width)
+
+
+# Options the multi-file driver (\sa compile_sources) & the watcher don't support
+SINGLE_FILE_OPTIONS = {'emit_ast': '--emit-ast', 'emit_llvm': '--emit-llvm', 'optimize': '-O',
+                       'check': '--check', 'dump_tokens': '--dump-tokens'}
+
+
+def _single_file_options(args: argparse.Namespace) -> list:
+    '''Returns the given options of @param args that need a single source.'''
+    return [flag for dest, flag in SINGLE_FILE_OPTIONS.items() if getattr(args, dest)]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(prog='astro', description='LLVM-Astro compiler.',
+                                         formatter_class=_help_formatter)
+    arg_parser.add_argument('files', nargs='*', metavar='file',
+                            help='Astro source files, directories or glob patterns to compile.')
+    arg_parser.add_argument('-j', '--jobs', type=int,
+                            help='Worker processes for multiple files (default: CPU count).')
+    arg_parser.add_argument('--dump-tokens', nargs='?', const='text', choices=['text', 'binary'],
+                            help='Dump the tokens (text log by default).')
+    arg_parser.add_argument('--dump-path', help='Token dump destination.')
+    arg_parser.add_argument('--emit-ast', metavar='PATH',
+                            help='Write the AST of a single file in the binary AST format.')
+    arg_parser.add_argument('--emit-llvm', metavar='PATH',
+                            help='Write the LLVM IR of a single file (- for stdout), generated '
+                                 'function by function while parsing (needs LLVM 15+).')
+    arg_parser.add_argument('-O', '--optimize', action='store_true',
+                            help='Fold constant expressions & share identical leaves before '
+                                 'emitting the AST/IR.')
+    arg_parser.add_argument('--check', action='store_true',
+                            help='Validate calls & assignments and report AST statistics '
+                                 '(analysis passes fused into a single walk), exit status 1 on issues.')
+    arg_parser.add_argument('--stream', action='store_true',
+                            help='Stream the file through tokenizer & parser line by line.')
+    arg_parser.add_argument('--mmap', action='store_true',
+                            help='Memory-map the file and lex its raw bytes.')
+    arg_parser.add_argument('--lex-workers', type=int, default=1,
+                            help='Lex a single large file in line chunks on this many processes.')
+    arg_parser.add_argument('--cache', metavar='DIR', nargs='?', const='.astro_cache',
+                            help='Reuse tokens & AST of unchanged sources from the cache directory.')
+    arg_parser.add_argument('--profile', nargs='?', const='json', choices=PROFILE_FORMATS,
+                            help='Time & memory-sample every compiler phase, export the '
+                                 'metrics (JSON by default).')
+    arg_parser.add_argument('--profile-out', metavar='PATH',
+                            help='Profile metrics destination (default: stdout, the '
+                                 'compiler\'s own output then goes to stderr).')
+    arg_parser.add_argument('--profile-memory', action=argparse.BooleanOptionalAction, default=True,
+                            help='Sample peak memory per phase with tracemalloc '
+                                 '(inflates the phase timings).')
+    arg_parser.add_argument('--cprofile', metavar='PATH',
+                            help='Capture a cProfile of the compiler phases into PATH '
+                                 '(implies --profile).')
+    arg_parser.add_argument('--color', choices=['auto', 'always', 'never'], default='auto',
+                            help='Colored output (auto: only when writing to a terminal).')
+    arg_parser.add_argument('--watch', action='store_true',
+                            help='Keep running, recompile files whose content changed.')
+    arg_parser.add_argument('--watch-interval', type=float, default=0.5, metavar='SECONDS',
+                            help='Seconds between scans of the watched sources.')
+    arg_parser.add_argument('--watch-debounce', type=float, default=0.2, metavar='SECONDS',
+                            help='Recompile once the sources have been quiet this long.')
+    arg_parser.add_argument('--poll', action='store_true',
+                            help='Watch by polling only, even if inotify is available.')
+    arg_parser.add_argument('--serve', action='store_true',
+                            help='Run a persistent compile server, compiles are forwarded to it '
+                                 'while it is running.')
+    arg_parser.add_argument('--stop-server', action='store_true',
+                            help='Shut the running compile server down.')
+    arg_parser.add_argument('--socket', metavar='PATH',
+                            help='Compile server socket (default: $ASTRO_SERVER_SOCKET or a '
+                                 'per-user socket).')
+    arg_parser.add_argument('--no-server', action='store_true',
+                            help='Always compile in this process, even if a server is running.')
+    arg_parser.add_argument('-l', '--log-level', type=int, action='append', default=[],
+                            help='Enable parser log output of the given level (repeatable).')
+    args = arg_parser.parse_args(argv)
+    if not args.files and not (args.serve or args.stop_server):
+        arg_parser.error('the following arguments are required: file')
+    single = _single_file_options(args)
+    if single and (len(args.files) > 1 or args.jobs is not None or args.watch):
+        arg_parser.error(f'{", ".join(single)} can only be used with a single source file '
+                         f'(without -j/--jobs and --watch)')
+    if args.profile is not None and args.profile_out is None and args.emit_llvm == '-':
+        arg_parser.error('--profile needs --profile-out when the IR is written to stdout')
+    if args.stream and args.cache is None and args.dump_tokens == 'binary':
+        arg_parser.error('--dump-tokens binary can\'t be used with --stream (text dumps can)')
+    if args.color != 'auto':
+        use_colors(args.color == 'always')
+    if args.cprofile and args.profile is None:
+        args.profile = 'json'
+    return args
+
+
+def export_profile(profiler: PhaseProfiler, args: argparse.Namespace):
+    '''Outputs the collected profile metrics, \sa profiling.py@PhaseProfiler.'''
+    profiler.stop()
+    if args.cprofile:
+        profiler.dump_cprofile(args.cprofile)
+    metrics = profiler.export(args.profile)
+    if not metrics.endswith('\n'):
+        metrics += '\n'
+    if isinstance(args.profile_out, str):
+        with open(args.profile_out, 'w') as f:
+            f.write(metrics)
+    else:
+        args.profile_out.write(metrics)
+        args.profile_out.flush()
+
+
+def compile_sources(sources: list, args: argparse.Namespace) -> int:
+    '''Compiles multiple files over the process pool, outputs the diagnostics
+    per file (in the given order) and the throughput summary.'''
+    profiler = None
+    if args.profile is not None:
+        # Phases run inside the worker processes, only the driver is profiled
+        profiler = PhaseProfiler(
+            ' '.join(sources), memory=args.profile_memory, cprofile=args.cprofile is not None
+        )
+
+    start = time.perf_counter()
+    with profiler.phase('compile') if profiler else nullcontext():
+        results = compile_many(sources, workers=args.jobs, cache_dir=args.cache, memory_map=args.mmap)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        for diagnostic in result.diagnostics:
+            print(f'{result.path}: {diagnostic}')
+
+    asxout(Coloring.src_log, 'Driver', summarize(results, elapsed))
+    if profiler is not None:
+        profiler.count('files', len(results))
+        for counter in ('lines', 'tokens', 'expressions'):
+            profiler.count(counter, sum(getattr(result, counter) for result in results))
+        export_profile(profiler, args)
+    return 0 if all(result.ok for result in results) else 1
+
+
+def forward_sources(sources: list, args: argparse.Namespace) -> int | None:
+    '''Compiles @param sources on the running compile server (\sa server/daemon.py),
+    returns None if there is no server (or it went away).'''
+    # Only the package (not the socket machinery) is imported up front
+    from server import default_socket_path
+    socket_path = args.socket or default_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    from server.client import connect
+    from server.protocol import ProtocolError
+    client = connect(socket_path)
+    if client is None:
+        return None
+    start = time.perf_counter()
+    try:
+        with client:
+            responses = client.compile_many(sources)
+    except (OSError, ProtocolError) as e:
+        asxout(Coloring.src_warning, 'Client', f'compile server failed ({e}), compiling locally.')
+        return None
+    elapsed = time.perf_counter() - start
+
+    if len(sources) == 1:
+        for diagnostic in responses[0].diagnostics:
+            print(diagnostic)
+    else:
+        results = [
+            CompileResult(path, r.ok, r.lines, r.tokens, r.expressions, r.seconds, r.cached,
+                          r.diagnostics)
+            for path, r in zip(sources, responses)
+        ]
+        for result in results:
+            for diagnostic in result.diagnostics:
+                print(f'{result.path}: {diagnostic}')
+        asxout(Coloring.src_log, 'Client', summarize(results, elapsed))
+    return 0 if all(response.ok for response in responses) else 1
+
+
+def watch_sources(args: argparse.Namespace) -> int:
+    '''Compiles the sources, then recompiles changed ones until interrupted,
+    \sa watch.py@Watcher.'''
+    from watch import Watcher
+
+    def report(cycle, watcher: Watcher):
+        for result in cycle.compiled:
+            for diagnostic in result.diagnostics:
+                print(f'{result.path}: {diagnostic}')
+        for path in cycle.removed:
+            asxout(Coloring.src_log, 'Watch', f'{path} removed.')
+        results = list(watcher.results.values())
+        failed = sum(not result.ok for result in results)
+        asxout(
+            Coloring.src_log, 'Watch',
+            f'{len(cycle.compiled)} recompiled, {len(cycle.unchanged)} unchanged content, '
+            f'{len(results)} files ({failed} failed) in {cycle.seconds:.3f}s. Watching...'
+        )
+
+    watcher = Watcher(
+        args.files, workers=args.jobs, cache_dir=args.cache, memory_map=args.mmap,
+        interval=args.watch_interval, debounce=args.watch_debounce, use_inotify=not args.poll,
+    )
+    try:
+        watcher.run(report)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def make_checks(resolver):
+    '''Returns the analysis passes of --check, \sa parse/analysis.py. Calls
+    are resolved through the declaration index of @param resolver (the
+    Parser or the cached DeclarationIndex).'''
+    from parse.visitor import PassManager
+    from parse.analysis import NodeStats, CallValidator
+    checks = PassManager([NodeStats(), CallValidator(resolver)])
+    checks.begin()
+    return checks
+
+
+def report_checks(checks) -> int:
+    '''Outputs the outcome of @param checks, returns the number of issues.'''
+    results = checks.results()
+    for issue in results['validation']:
+        asxout(Coloring.src_warning, 'Check', issue)
+    stats = results['stats']
+    asxout(Coloring.src_log, 'Check',
+           f'{stats["nodes"]} nodes, {stats["lists"]} lists, max depth {stats["max_depth"]}, '
+           f'{len(results["validation"])} issue(s).')
+    return len(results['validation'])
+
+
+def report_optimizer(optimizer: Optimizer):
+    stats = optimizer.stats()
+    asxout(Coloring.src_log, 'Optimizer',
+           f'{stats.folded} expressions folded, {stats.shared} leaves shared: '
+           f'{stats.nodes_before} => {stats.nodes_after} nodes, '
+           f'{stats.bytes_saved / 1024:.1f} KiB saved.')
+
+
+def emit_ast(ast: list, path: str):
+    from parse.serialize import write_ast
+    write_ast(ast, path)
+    asxout(Coloring.src_log, 'Serializer', f'AST written to {path}.')
+
+
+def emit_llvm(expressions, destination, source_name: str):
+    '''Writes the LLVM IR of @param expressions to @param destination (a
+    path or the IR stream, \sa main).'''
+    from codegen.llvm_ir import emit_ir
+    stats = emit_ir(expressions, destination, source_name)
+    if isinstance(destination, str):
+        asxout(Coloring.src_log, 'Codegen',
+               f'LLVM IR written to {destination} ({stats.functions} functions, '
+               f'{stats.instructions} instructions).')
+    return stats
+
+
+def compile_cached(entry, args: argparse.Namespace, profiler: PhaseProfiler = None) -> int:
+    '''Runs the steps after parsing on the cached compile @param entry (\sa
+    cache.py@CacheEntry), neither tokenizer nor parser run, returns the exit
+    status.'''
+    phase = profiler.phase if profiler is not None else lambda name: nullcontext()
+    tokens, ast = entry.tokens, entry.ast
+    optimizer = checks = None
+    if args.optimize:
+        optimizer = Optimizer()
+        with phase('optimize'):
+            ast = optimizer.optimize_all(ast)
+        report_optimizer(optimizer)
+    issues = 0
+    if args.check:
+        checks = make_checks(entry.declarations)
+        with phase('check'):
+            checks.run(ast)
+        issues = report_checks(checks)
+    if args.emit_ast is not None:
+        with phase('emit_ast'):
+            emit_ast(ast, args.emit_ast)
+    ir_stats = None
+    if args.emit_llvm is not None:
+        with phase('codegen'):
+            ir_stats = emit_llvm(ast, args.emit_llvm, args.file)
+
+    if profiler is not None:
+        profiler.count('tokens', len(tokens))
+        profiler.count('lines', tokens.line_count)
+        profiler.count('expressions', len(ast))
+        profiler.count('ast_nodes', count_nodes(ast))
+        if optimizer is not None:
+            opt_stats = optimizer.stats()
+            profiler.count('folded', opt_stats.folded)
+            profiler.count('shared_leaves', opt_stats.shared)
+            profiler.count('nodes_saved', opt_stats.nodes_saved)
+            profiler.count('bytes_saved', opt_stats.bytes_saved)
+        if checks is not None:
+            profiler.count('check_issues', issues)
+        if ir_stats is not None:
+            profiler.count('ir_functions', ir_stats.functions)
+            profiler.count('ir_instructions', ir_stats.instructions)
+        export_profile(profiler, args)
+    return 1 if issues else 0
+
+
+def _forwardable(args: argparse.Namespace) -> bool:
+    '''Whether the requested compile can be done by the compile server,
+    which only runs the plain front-end (with its own cache, in its own threads).'''
+    return not (args.no_server or args.watch or args.profile or args.stream or args.mmap or
+                args.dump_tokens or args.emit_ast or args.emit_llvm or args.optimize or
+                args.check or args.lex_workers > 1 or args.log_level or
+                args.cache is not None or args.jobs is not None)
 
 
 # Entrypoint
 def main(): 
-    # Argument Error Handling (TODO -> Implement argparse).
-    assert len(sys.argv) != 0, '[Argpass-Error-FATAL]: No src Arguments given.'
-    assert len(sys.argv) != 1, '[Argpass-Error-FATAL]: No input file given.'
+    args = parse_args()
+    if args.emit_llvm == '-':
+        # stdout only carries the IR, diagnostics go to stderr instead
+        args.emit_llvm, sys.stdout = sys.stdout, sys.stderr
+    elif args.profile is not None and args.profile_out is None:
+        # Likewise stdout only carries the metrics (\sa export_profile)
+        args.profile_out, sys.stdout = sys.stdout, sys.stderr
+
+    if args.serve:
+        from server.daemon import serve
+        sys.exit(serve(args.socket, cache_dir=args.cache))
+    if args.stop_server:
+        from server.client import stop_server
+        if not stop_server(args.socket):
+            asxout(Coloring.src_warning, 'Client', 'No compile server is running.')
+        if not args.files:
+            return
+
+    if args.watch:
+        sys.exit(watch_sources(args))
+
+    sources = collect_sources(args.files)
+    if not sources:
+        asxout(Coloring.src_error, 'Driver', 'No source files found.')
+    if len(sources) > 1 and _single_file_options(args):
+        # A directory/glob argument matched several files
+        asxout(Coloring.src_error, 'Driver', f'{", ".join(_single_file_options(args))} '
+                                             f'can only be used with a single source file, got {len(sources)}.')
+    if _forwardable(args):
+        status = forward_sources(sources, args)
+        if status is not None:
+            sys.exit(status)
+
+    if len(sources) != 1 or args.jobs is not None:
+        sys.exit(compile_sources(sources, args))
+    args.file = sources[0]
+
+    profiler = None
+    phase = lambda name: nullcontext()
+    if args.profile is not None:
+        profiler = PhaseProfiler(
+            args.file, memory=args.profile_memory, cprofile=args.cprofile is not None
+        )
+        phase = profiler.phase
+
+    # Unchanged sources skip tokenization & parsing entirely
+    cache = key = None
+    if args.cache is not None:
+        from cache import CompileCache  # (hashlib & zlib) only when caching
+        with phase('cache_lookup'):
+            cache = CompileCache(args.cache)
+            with open(args.file, 'rb') as f:
+                key = cache.key(f.read())
+            entry = cache.get(key)
+        if profiler is not None:
+            profiler.count('cache_hit', int(entry is not None))
+        if entry is not None:
+            asxout(Coloring.src_log, 'Cache', f'{args.file} up to date. {cache.stats()}')
+            sys.exit(compile_cached(entry, args, profiler))
+
+    # File Handle establishment & Tokenization, profiled runs load & clean up
+    # the content in separate phases (streamed/mapped files aren't cleaned up
+    # in place)
+    split_cleanup = profiler is not None and not (args.stream or args.mmap)
+    with phase('load'):
+        file_handle = AstroFile(
+            args.file, cleanup=not split_cleanup, stream=args.stream, memory_map=args.mmap
+        )
+    if split_cleanup:
+        with phase('cleanup'):
+            file_handle._cleanup()
+
+    tokenizer = Tokenizer(
+        file_handle,
+        save_tokens=args.dump_tokens is not None,
+        dump_format=args.dump_tokens or 'text',
+        dump_path=args.dump_path,
+        symbols=SymbolTable(),
+    )
+    streamed = args.stream and cache is None
+    if streamed:
+        # Lexing happens on demand while parsing, hence a single phase
+        stream_counts = {}
+        tokens = tokenizer.stream()
+        if profiler is not None:
+            tokens = counted(tokens, stream_counts)
+    else:
+        with phase('tokenize'):
+            tokens = tokenizer.tokenize(workers=args.lex_workers)
+        asxout(Coloring.src_log, 'Tokenizer', 'Tokenization finished.\n')
+
+    # Parsing with the AST, unless the AST is needed as a whole (caching,
+    # --emit-ast) the IR is generated while parsing, function by function
+    parser = Parser(tokens, remove_spaces=True, log_levels=args.log_level)
+    fused = args.emit_llvm is not None and cache is None and args.emit_ast is None
+    ast = ir_stats = None
+    optimizer = Optimizer() if args.optimize else None
+    checks = make_checks(parser) if args.check else None
+    with phase(('tokenize_' if streamed else '') + ('parse_codegen' if fused else 'parse')):
+        if fused:
+            expressions = parser.iter_parse()
+            if optimizer is not None:
+                expressions = optimizer.iter_optimize(expressions)
+            if checks is not None:
+                expressions = checks.iter_walk(expressions)
+            ir_stats = emit_llvm(expressions, args.emit_llvm, args.file)
+        else:
+            ast = parser.parse()
+
+    if cache is not None:
+        cache.put(key, tokens, ast, parser.declarations)
+        asxout(Coloring.src_log, 'Cache', f'{args.file} cached. {cache.stats()}')
+    file_handle.close()  # the tokens aren't materialized anymore
+
+    if optimizer is not None and not fused:
+        with phase('optimize'):
+            optimizer.optimize_all(ast)
+    if optimizer is not None:
+        report_optimizer(optimizer)
+    if checks is not None and not fused:
+        with phase('check'):
+            for expr in ast:
+                checks.walk(expr)
+    if checks is not None:
+        issues = report_checks(checks)
 
-    # File Handle establishment & Tokenization
-    file_handle = AstroFile(sys.argv[1], cleanup=True)
-    tokenizer = Tokenizer(file_handle, save_tokens=True)
-    tokens = tokenizer.tokenize()
-    asxout(Coloring.src_log, 'Tokenizer', 'Tokenization finished.\n')
+    if args.emit_ast is not None:
+        with phase('emit_ast'):
+            emit_ast(ast, args.emit_ast)
+    if args.emit_llvm is not None and not fused:
+        with phase('codegen'):
+            ir_stats = emit_llvm(ast, args.emit_llvm, args.file)
 
-    # Parsing with the AST
-    parser = Parser(tokens, remove_spaces=True, log_levels=[2])
-    parser.parse()
+    if profiler is not None:
+        if streamed:
+            profiler.count('tokens', stream_counts['tokens'])
+            profiler.count('lines', stream_counts['lines'])
+        else:
+            profiler.count('tokens', len(tokens))
+            profiler.count('lines', tokens.line_count)
+        profiler.count('symbols', len(parser.symbols))
+        profiler.count('declarations', len(parser.declarations))
+        if ast is not None:
+            profiler.count('expressions', len(ast))
+            profiler.count('ast_nodes', count_nodes(ast))
+        if optimizer is not None:
+            opt_stats = optimizer.stats()
+            profiler.count('folded', opt_stats.folded)
+            profiler.count('shared_leaves', opt_stats.shared)
+            profiler.count('nodes_saved', opt_stats.nodes_saved)
+            profiler.count('bytes_saved', opt_stats.bytes_saved)
+        if checks is not None:
+            profiler.count('check_issues', issues)
+        if ir_stats is not None:
+            profiler.count('ir_functions', ir_stats.functions)
+            profiler.count('ir_instructions', ir_stats.instructions)
+        export_profile(profiler, args)
+    if checks is not None and issues:
+        sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
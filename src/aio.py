@@ -0,0 +1,97 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the asyncio front-end API for embedding the compiler into event
+loop based services. Files are read & compiled in executors, so the event
+loop never blocks, fatal compile errors come back as failed results.
+Usage:
+    result = await aio.compile_file('main.astro')
+    results = await aio.compile_many(paths, concurrency=8)
+Note: By default the CPU-bound work runs on the loop's default (thread)
+      executor, pass a ProcessPoolExecutor as @param executor to compile
+      on several cores.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from concurrent.futures import Executor
+from typing import AsyncIterator, Iterable, List
+from driver import CompileResult, compile_source
+import asyncio
+import os
+
+
+def _read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+async def compile_file(path: str, cache_dir: str = None,
+                       executor: Executor = None) -> CompileResult:
+    '''Compiles the file @param path. The file is read on the loop's default
+    executor, tokenizer & parser run on @param executor.'''
+    loop = asyncio.get_running_loop()
+    try:
+        source = await loop.run_in_executor(None, _read, path)
+    except OSError as e:
+        return CompileResult(path, False, 0, 0, 0, 0.0, False, [f'[Driver-Error] - {e}'])
+    return await loop.run_in_executor(executor, compile_source, path, source, cache_dir)
+
+
+async def compile_text(source: str, name: str = '<source>', cache_dir: str = None,
+                       executor: Executor = None) -> CompileResult:
+    '''Compiles the in-memory @param source, @param name is only used for output.'''
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, compile_source, name, source.encode(), cache_dir)
+
+
+async def iter_compile(paths: Iterable[str], concurrency: int = None, cache_dir: str = None,
+                       executor: Executor = None) -> AsyncIterator[CompileResult]:
+    '''Compiles all @param paths, at most @param concurrency (default: CPU
+    count) at once, and yields the results as they are done. Paths are only
+    taken from @param paths once a slot is free, so (lazy) iterables of any
+    size don't pile up pending work.'''
+    limit = concurrency or os.cpu_count() or 1
+    semaphore = asyncio.Semaphore(limit)
+    pending = set()
+
+    async def bounded(path: str) -> CompileResult:
+        try:
+            return await compile_file(path, cache_dir, executor)
+        finally:
+            semaphore.release()
+
+    try:
+        for path in paths:
+            await semaphore.acquire()
+            pending.add(asyncio.ensure_future(bounded(path)))
+            # Hand out whatever finished in the meantime
+            done = {task for task in pending if task.done()}
+            pending -= done
+            for task in done:
+                yield task.result()
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def compile_many(paths: Iterable[str], concurrency: int = None, cache_dir: str = None,
+                       executor: Executor = None) -> List[CompileResult]:
+    '''Compiles all @param paths, at most @param concurrency (default: CPU
+    count) at once, the results keep the order of the paths.'''
+    semaphore = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+
+    async def bounded(path: str) -> CompileResult:
+        async with semaphore:
+            return await compile_file(path, cache_dir, executor)
+
+    return list(await asyncio.gather(*(bounded(path) for path in paths)))
@@ -0,0 +1,12 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains benchmarks of the LLVM-Astro front-end, run them from the src
+directory, e.g.: python -m benchmarks.frontend (\sa benchmarks/frontend.py).
+@module generator => deterministic synthetic Astro programs
+@module frontend  => per-phase time/throughput/memory + JSON baselines
+@module lexer     => single-pass lexer vs. the former two-pass tokenization
+@module startup   => CLI startup (`-X importtime`) against an import budget
+@module codegen   => streamed vs. batch LLVM IR generation (time & memory)
+@module optimize  => AST optimization pass, saved nodes/memory/AST & IR size
+@module visitor   => fused analysis passes vs. a walk per pass'''
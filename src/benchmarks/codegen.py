@@ -0,0 +1,123 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Benchmarks the LLVM IR emitter (\sa codegen/llvm_ir.py) on generated
+programs: the streaming pipeline (Tokenizer.stream => Parser.iter_parse =>
+IREmitter) against lowering a fully parsed AST, time & peak memory.
+Usage: python -m benchmarks.codegen --scales 10000,100000 [--verify]
+--verify assembles the IR with llvm-as if it's on the PATH (skipped otherwise).'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '.'
+# ===================================
+# Imports
+# ===================================
+from benchmarks.generator import write_source
+from tokenization.AstroFile import AstroFile
+from tokenization.Tokenizer import Tokenizer
+from parse.parser import Parser
+from codegen.llvm_ir import emit_ir
+import subprocess
+import argparse
+import tempfile
+import tracemalloc
+import shutil
+import time
+import sys
+import os
+
+
+def _streamed(path: str, ir_path: str):
+    tokens = Tokenizer(AstroFile(path, stream=True)).stream()
+    return emit_ir(Parser(tokens).iter_parse(), ir_path, path)
+
+
+def _batch(path: str, ir_path: str):
+    ast = Parser(Tokenizer(AstroFile(path)).tokenize()).parse()
+    return emit_ir(ast, ir_path, path)
+
+
+PIPELINES = {'streamed': _streamed, 'batch': _batch}
+
+
+def _measure(pipeline, path: str, ir_path: str, repeat: int) -> dict:
+    '''Best time of @param repeat runs, peak memory of an extra traced run.'''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stats = pipeline(path, ir_path)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    pipeline(path, ir_path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak, 'stats': stats}
+
+
+def verify(ir_path: str) -> str:
+    '''Assembles @param ir_path with llvm-as, returns 'ok', 'skipped' (no
+    llvm-as) or the assembler's error. LLVM < 15 needs opaque pointers
+    enabled explicitly, hence the second attempt.'''
+    if shutil.which('llvm-as') is None:
+        return 'skipped'
+    for flags in ([], ['-opaque-pointers']):
+        done = subprocess.run(['llvm-as', *flags, ir_path, '-o', os.devnull],
+                              capture_output=True, text=True)
+        if done.returncode == 0:
+            return 'ok'
+    return done.stderr.strip()
+
+
+def run_scale(lines: int, repeat: int = 3, seed: int = 0, check: bool = False) -> dict:
+    fd, path = tempfile.mkstemp(suffix='.astro')
+    os.close(fd)
+    ir_path = path[:-len('.astro')] + '.ll'
+    try:
+        write_source(path, lines, seed)
+        results = {name: _measure(pipeline, path, ir_path, repeat)
+                   for name, pipeline in PIPELINES.items()}
+        ir_bytes = os.path.getsize(ir_path)
+        status = verify(ir_path) if check else None
+    finally:
+        os.remove(path)
+        if os.path.exists(ir_path):
+            os.remove(ir_path)
+    return {'lines': lines, 'ir_bytes': ir_bytes, 'verify': status, 'pipelines': results}
+
+
+def _report(result: dict):
+    stats = result['pipelines']['streamed']['stats']
+    print(f'{result["lines"]} lines => {result["ir_bytes"] / 2**20:.2f} MiB IR, '
+          f'{stats.functions} functions, {stats.declarations} declarations, '
+          f'{stats.instructions} instructions')
+    for name, run in result['pipelines'].items():
+        print(f'  {name:<8}: {run["seconds"] * 1000:10.2f} ms'
+              f' {result["lines"] / run["seconds"]:12,.0f} lines/s'
+              f' {run["peak_bytes"] / 2**20:10.2f} MiB peak')
+    if result['verify'] is not None:
+        print(f'  llvm-as : {result["verify"]}')
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(prog='benchmarks.codegen')
+    arg_parser.add_argument('--scales', default='10000,100000',
+                            help='Comma separated program sizes in lines.')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--verify', action='store_true',
+                            help='Assemble the IR with llvm-as (if installed).')
+    args = arg_parser.parse_args(argv)
+
+    failed = False
+    for scale in (int(s) for s in args.scales.split(',')):
+        result = run_scale(scale, args.repeat, args.seed, args.verify)
+        _report(result)
+        failed |= result['verify'] not in (None, 'ok', 'skipped')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Benchmarks the front-end phases (AstroFile => Tokenizer => Parser) on
+generated programs, compares the results against a saved JSON baseline.
+Usage: python -m benchmarks.frontend --scales 1000,10000 [--save-baseline b.json]
+                                     [--baseline b.json --threshold 0.15]'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '.'
+# ===================================
+# Imports
+# ===================================
+from benchmarks.generator import write_source
+from tokenization.AstroFile import AstroFile
+from tokenization.Tokenizer import Tokenizer
+from parse.parser import Parser
+import argparse
+import tempfile
+import tracemalloc
+import json
+import time
+import sys
+import os
+
+PHASES = ('load', 'tokenize', 'parse')
+BASELINE_VERSION = 1
+
+
+def _run_phases(path: str, measure_memory: bool) -> dict:
+    '''Runs every phase once, returns {phase: seconds or peak bytes}.'''
+    results = {}
+
+    def phase(name, func, *args):
+        if measure_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        value = func(*args)
+        elapsed = time.perf_counter() - start
+        if measure_memory:
+            results[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            results[name] = elapsed
+        return value
+
+    h_file = phase('load', AstroFile, path)
+    tokens = phase('tokenize', Tokenizer(h_file).tokenize)
+    phase('parse', Parser(tokens).parse)
+    results['tokens'] = len(tokens)
+    return results
+
+
+def run_scale(lines: int, repeat: int = 3, seed: int = 0) -> dict:
+    '''Benchmarks a generated program of @param lines lines, the best time
+    of @param repeat runs is reported per phase, memory is sampled in an
+    extra run (tracemalloc slows everything down).'''
+    fd, path = tempfile.mkstemp(suffix='.astro')
+    os.close(fd)
+    try:
+        write_source(path, lines, seed)
+        runs = [_run_phases(path, measure_memory=False) for _ in range(repeat)]
+        memory = _run_phases(path, measure_memory=True)
+    finally:
+        os.remove(path)
+
+    tokens = runs[0]['tokens']
+    phases = {}
+    for name in PHASES:
+        seconds = min(run[name] for run in runs)
+        phases[name] = {
+            'seconds': seconds,
+            'tokens_per_second': tokens / seconds if seconds else 0.0,
+            'peak_bytes': memory[name],
+        }
+    return {'lines': lines, 'tokens': tokens, 'phases': phases}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    '''Returns a message for every phase which got slower than the baseline
+    by more than @param threshold (0.1 => 10%).'''
+    regressions = []
+    for scale, result in results.items():
+        base = baseline.get('results', {}).get(scale)
+        if base is None:
+            continue
+        for name, phase in result['phases'].items():
+            before = base['phases'].get(name, {}).get('seconds')
+            if before and phase['seconds'] > before * (1 + threshold):
+                regressions.append(
+                    f'{name} @ {scale} lines: {before * 1000:.2f} ms -> '
+                    f'{phase["seconds"] * 1000:.2f} ms (+{(phase["seconds"] / before - 1) * 100:.1f}%)'
+                )
+    return regressions
+
+
+def _report(result: dict):
+    print(f'{result["lines"]} lines, {result["tokens"]} tokens')
+    for name, phase in result['phases'].items():
+        print(f'  {name:<9}: {phase["seconds"] * 1000:10.2f} ms'
+              f' {phase["tokens_per_second"]:14,.0f} tok/s'
+              f' {phase["peak_bytes"] / 2**20:10.2f} MiB peak')
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(prog='benchmarks.frontend')
+    arg_parser.add_argument('--scales', default='1000,10000,100000',
+                            help='Comma separated program sizes in lines (1K to 1M).')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--save-baseline', metavar='PATH', help='Write the results as JSON baseline.')
+    arg_parser.add_argument('--baseline', metavar='PATH', help='Fail on regressions against this baseline.')
+    arg_parser.add_argument('--threshold', type=float, default=0.15,
+                            help='Allowed slowdown per phase before failing (0.15 => 15%%).')
+    args = arg_parser.parse_args(argv)
+
+    results = {}
+    for scale in (int(s) for s in args.scales.split(',')):
+        results[str(scale)] = run_scale(scale, args.repeat, args.seed)
+        _report(results[str(scale)])
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'version': BASELINE_VERSION, 'seed': args.seed, 'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for msg in regressions:
+            print(f'[Benchmark-Regression] - {msg}')
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the deterministic generator of synthetic Astro programs
+used by the front-end benchmarks.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '.'
+# ===================================
+# Imports
+# ===================================
+from typing import Iterator
+import random
+
+NAMES = ('main', 'print', 'foo', 'bar', 'value', 'counter', 'x', 'y', 'alpha', 'omega')
+
+
+def _letters(number: int) -> str:
+    '''Spells @param number in letters (a, b, ..., z, ba, ...), names stay
+    digit free so the legacy lexer (\sa benchmarks.lexer) agrees on them.'''
+    letters = ''
+    while True:
+        number, digit = divmod(number, 26)
+        letters = chr(ord('a') + digit) + letters
+        if not number:
+            return letters
+
+
+def _operand(rng: random.Random) -> str:
+    return str(rng.randint(0, 99999)) if rng.random() < 0.5 else rng.choice(NAMES)
+
+
+def generate_lines(lines: int, seed: int = 0, comments: bool = True,
+                   operators: bool = True) -> Iterator[str]:
+    '''Yields exactly @param lines lines of an Astro program, the same
+    (seed, lines) pair always yields the same program. Mixes (unique) declarations
+    (!name(args):), parenthesized expressions, numbers and, optionally,
+    line and block comments as well as calls & binary operator expressions.'''
+    rng = random.Random(seed)
+    produced = 0
+    declared = 0
+    while produced < lines:
+        roll = rng.random()
+        if comments and roll < 0.05 and lines - produced >= 3:
+            yield f';; {rng.choice(NAMES)} block'
+            yield f'   comment {rng.randint(0, 999)}'
+            yield ';;'
+            produced += 3
+            continue
+
+        if roll < 0.2:
+            # Unique per program, so there are no redeclarations
+            name = '_'.join(rng.sample(NAMES, 2) + [_letters(declared)])
+            declared += 1
+            args = ', '.join(rng.sample(NAMES, rng.randint(0, 3)))
+            line = f'!{name}({args}):'
+        elif roll < 0.45 or not operators:
+            args = ', '.join(_operand(rng) for _ in range(rng.randint(1, 5)))
+            line = f'    ({args})'
+        elif roll < 0.6:
+            line = f'    {rng.randint(0, 1 << 20)}'
+        elif roll < 0.8:
+            args = ', '.join(_operand(rng) for _ in range(rng.randint(0, 4)))
+            line = f'    {rng.choice(NAMES)}({args})'
+        else:
+            lhs, rhs = _operand(rng), _operand(rng)
+            op, inner = rng.choice('+-*/%<>'), rng.choice('+-*/')
+            line = f'    {rng.choice(NAMES)} = {lhs} {op} ({rhs} {inner} {_operand(rng)})'
+
+        if comments and rng.random() < 0.1:
+            line += f' ; {rng.choice(NAMES)} note'
+        yield line
+        produced += 1
+
+
+def generate_source(lines: int, seed: int = 0, comments: bool = True,
+                    operators: bool = True) -> str:
+    '''Returns the whole generated program, \sa generate_lines.'''
+    return '\n'.join(generate_lines(lines, seed, comments, operators))
+
+
+def write_source(path: str, lines: int, seed: int = 0, comments: bool = True,
+                 operators: bool = True):
+    '''Writes the generated program to @param path without holding it in memory.'''
+    with open(path, 'w', buffering=1 << 16) as f:
+        for line in generate_lines(lines, seed, comments, operators):
+            f.write(line)
+            f.write('\n')
@@ -0,0 +1,162 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Benchmarks the single-pass lexer (filling a TokenBuffer) against the
+former per-character + _compress (two-pass) tokenization.
+Usage: python -m benchmarks.lexer --scales 20000 [--repeat 3] [--seed 0]'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '.'
+# ===================================
+# Imports
+# ===================================
+from tokenization.Tokens import Token, TokenType, TokenBuffer, remove_tokens
+from tokenization.Tokenizer import lex_into
+from benchmarks.generator import generate_source
+from typing import List
+import argparse
+import time
+import tracemalloc
+import sys
+
+
+def legacy_tokenize(content: str) -> List[List[Token]]:
+    '''Reference copy of the two-pass Tokenizer.tokenize (without the log file),
+    one Token per character, followed by _compress merging SYM into NAME.'''
+    toks = []
+
+    type_map = {
+        ' ':  TokenType.SPACE,
+        '!':  TokenType.EXCL,
+        '(':  TokenType.LPAREN,
+        ')':  TokenType.RPAREN,
+        '<':  TokenType.LCHEV,
+        '>':  TokenType.RCHEV,
+        ':':  TokenType.COLON,
+        ',':  TokenType.COMMA,
+        '\'': TokenType.QUOTE,
+        '"':  TokenType.DBQUOTE,
+        '=':  TokenType.ASSIGN,
+    }
+
+    for line in content.split('\n'):
+        line_buffer = []
+        for i, ch in enumerate(line):
+            typ = TokenType.NUMBER  if str(ch).isnumeric() \
+                                    and not line[i-1].isalpha() \
+                                    else type_map.get(ch, TokenType.SYM)
+            line_buffer.append(Token(typ, ch))
+        toks.append(line_buffer)
+
+    return legacy_compress(toks, TokenType.SYM, TokenType.NAME)
+
+
+def legacy_compress(tokens: list, from_: int, to_: int) -> list:
+    '''Reference copy of the former Tokenizer._compress.'''
+    toks = []
+    for line in tokens:
+        value_buf = ""
+        line_buf = []
+
+        for i, tok in enumerate(line):
+            if tok.id != from_:
+                line_buf.append(tok)
+
+            if i != len(line) - 1:
+                if tok.id == from_ and line[i+1].id == from_:
+                    value_buf += tok.value
+                elif tok.id == from_ and line[i+1].id != from_:
+                    value_buf += tok.value
+                    line_buf.append(Token(id_=to_, value=value_buf))
+                    value_buf = ""
+            elif tok.id == from_:
+                value_buf += tok.value
+                line_buf.append(Token(id_=to_, value=value_buf))
+                value_buf = ""
+
+        toks.append(line_buf)
+
+    return toks
+
+
+def single_pass_tokenize(content: str) -> TokenBuffer:
+    '''The current tokenization path, \sa Tokenizer.tokenize.'''
+    toks = TokenBuffer(content)
+    lex_into(toks)
+    return toks
+
+
+def _stream(toks: List[List[Token]] | TokenBuffer) -> list:
+    '''Flattens tokens into (id, value) pairs the way the parser sees them
+    (spaces removed). Adjacent NUMBER tokens are merged, since the legacy
+    path emitted one NUMBER token per digit.'''
+    if isinstance(toks, TokenBuffer):
+        toks = toks.split_lines()
+
+    stream = []
+    for line in toks:
+        for tok in remove_tokens(line, TokenType.SPACE):
+            if tok.id == TokenType.NUMBER and stream and stream[-1][0] == TokenType.NUMBER:
+                stream[-1] = (TokenType.NUMBER, stream[-1][1] + tok.value)
+            else:
+                stream.append((tok.id, tok.value))
+        stream.append((TokenType.NEWLINE, '\n'))
+    return stream
+
+
+def _best_of(func, arg, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(func, arg) -> int:
+    '''Returns the peak of traced allocations while holding the result.'''
+    tracemalloc.start()
+    result = func(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def run_scale(lines: int, repeat: int = 3, seed: int = 0):
+    # The legacy path has no operator tokens (they were glued into NAMEs)
+    content = generate_source(lines, seed, comments=False, operators=False)
+
+    assert _stream(single_pass_tokenize(content)) == _stream(legacy_tokenize(content)), \
+        'single-pass token stream differs from the legacy token stream'
+
+    legacy_time = _best_of(legacy_tokenize, content, repeat)
+    new_time = _best_of(single_pass_tokenize, content, repeat)
+    legacy_peak = _peak_memory(legacy_tokenize, content)
+    new_peak = _peak_memory(single_pass_tokenize, content)
+
+    print(f'source     : {lines} lines, {len(content)} chars')
+    print(f'two-pass   : {legacy_time * 1000:9.2f} ms')
+    print(f'single-pass: {new_time * 1000:9.2f} ms')
+    print(f'speedup    : {legacy_time / new_time:9.2f}x')
+    print(f'peak memory: {legacy_peak / 2**20:9.2f} MiB (two-pass), '
+          f'{new_peak / 2**20:.2f} MiB (token buffer)')
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(prog='benchmarks.lexer')
+    arg_parser.add_argument('--scales', default='20000',
+                            help='Comma separated program sizes in lines.')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    for scale in (int(s) for s in args.scales.split(',')):
+        run_scale(scale, args.repeat, args.seed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Benchmarks the AST optimization pass (\sa parse/optimize.py) on generated
+programs: the pass' own time, the nodes & memory it saves (as reported and
+as traced) and what it saves further down (binary AST, LLVM IR).
+Usage: python -m benchmarks.optimize --scales 10000,100000 [--repeat 3] [--seed 0]'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '.'
+# ===================================
+# Imports
+# ===================================
+from benchmarks.generator import generate_source
+from tokenization.AstroFile import AstroFile
+from tokenization.Tokenizer import Tokenizer
+from parse.parser import Parser
+from parse.optimize import Optimizer
+from parse.serialize import dump_ast
+from codegen.llvm_ir import IREmitter
+import tracemalloc
+import argparse
+import time
+import sys
+import io
+
+
+def _parse(source: str) -> list:
+    return Parser(Tokenizer(AstroFile.from_source(source)).tokenize()).parse()
+
+
+def _retained(source: str, optimize: bool) -> int:
+    '''Traced bytes still held by the AST (tokens dropped) after parsing &
+    optionally optimizing it.'''
+    tracemalloc.start()
+    ast = _parse(source)
+    optimizer = None
+    if optimize:
+        optimizer = Optimizer()
+        optimizer.optimize_all(ast)
+        optimizer.leaves.clear()  # the AST keeps what is still needed
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del ast, optimizer
+    return retained
+
+
+def _instructions(ast: list) -> int:
+    return IREmitter(io.StringIO()).emit_all(ast).close().instructions
+
+
+def run_scale(lines: int, repeat: int = 3, seed: int = 0):
+    source = generate_source(lines, seed)
+    ast = _parse(source)
+    plain_ast, plain_ir = len(dump_ast(ast)), _instructions(ast)
+
+    # The pass rewrites the AST in place, every run gets a fresh one
+    seconds = float('inf')
+    for run in range(repeat):
+        if run:
+            ast = _parse(source)
+        optimizer = Optimizer()
+        start = time.perf_counter()
+        optimizer.optimize_all(ast)
+        seconds = min(seconds, time.perf_counter() - start)
+    stats = optimizer.stats()
+
+    plain_memory, optimized_memory = _retained(source, False), _retained(source, True)
+    optimized_ast, optimized_ir = len(dump_ast(ast)), _instructions(ast)
+
+    print(f'source      : {lines} lines')
+    print(f'pass        : {seconds * 1000:9.2f} ms, {stats.folded} folded, {stats.shared} leaves shared')
+    print(f'nodes       : {stats.nodes_before} => {stats.nodes_after} (-{stats.nodes_saved})')
+    print(f'node memory : {stats.bytes_before / 2**20:9.2f} => {stats.bytes_after / 2**20:.2f} MiB '
+          f'(-{stats.bytes_saved / 2**20:.2f} MiB reported)')
+    print(f'retained    : {plain_memory / 2**20:9.2f} => {optimized_memory / 2**20:.2f} MiB (traced)')
+    print(f'binary AST  : {plain_ast / 2**20:9.2f} => {optimized_ast / 2**20:.2f} MiB')
+    print(f'IR          : {plain_ir:9} => {optimized_ir} instructions')
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(prog='benchmarks.optimize')
+    arg_parser.add_argument('--scales', default='100000',
+                            help='Comma separated program sizes in lines.')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    for scale in (int(s) for s in args.scales.split(',')):
+        run_scale(scale, args.repeat, args.seed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Benchmarks the CLI startup of a small compile, the import time is taken
+from `python -X importtime` and checked against a budget (the time the
+bare interpreter needs for its own imports is subtracted).
+Usage: python -m benchmarks.startup [--runs 10] [--budget-ms 40] [--top 10]'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '.'
+# ===================================
+# Imports
+# ===================================
+from statistics import median
+from typing import Dict, List, Tuple
+import subprocess
+import argparse
+import tempfile
+import time
+import sys
+import os
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRYPOINT = os.path.join(SRC_DIR, '__main__.py')
+
+SAMPLE_SOURCE = '!main(argc, argv):\n    print(argc + 1)\n'
+
+
+def parse_importtime(stderr: str) -> Tuple[int, Dict[str, int]]:
+    '''Returns the total import time (us) & the cumulative time of every top
+    level import of a `-X importtime` log, nested imports are part of the
+    cumulative time of the module importing them.'''
+    total = 0
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        cumulative, name = fields[1].strip(), fields[2]
+        # Skips the header & nested imports (indented by 2 spaces per level)
+        if not cumulative.isdigit() or name.startswith('  '):
+            continue
+        name = name.strip()
+        total += int(cumulative)
+        top_level[name] = top_level.get(name, 0) + int(cumulative)
+    return total, top_level
+
+
+def _run(argv: List[str]) -> Tuple[float, str]:
+    '''Runs @param argv from the src directory, returns (wall seconds, stderr).'''
+    start = time.perf_counter()
+    proc = subprocess.run(argv, cwd=SRC_DIR, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE, text=True,
+                          env=dict(os.environ, NO_COLOR='1'))
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f'{" ".join(argv)} failed:\n{proc.stderr}')
+    return elapsed, proc.stderr
+
+
+def measure(runs: int = 10) -> dict:
+    '''Compiles a tiny program @param runs times, returns the median wall &
+    import times of the compiler and of a bare interpreter (`-c pass`).'''
+    fd, path = tempfile.mkstemp(suffix='.astro')
+    with os.fdopen(fd, 'w') as f:
+        f.write(SAMPLE_SOURCE)
+
+    compiler = [sys.executable, ENTRYPOINT, path]
+    interpreter = [sys.executable, '-c', 'pass']
+    try:
+        samples = {'wall': [], 'imports': [], 'bare_wall': [], 'bare_imports': []}
+        modules = {}
+        for _ in range(runs):
+            samples['wall'].append(_run(compiler)[0])
+            samples['bare_wall'].append(_run(interpreter)[0])
+
+            total, top_level = parse_importtime(_run(compiler[:1] + ['-X', 'importtime'] + compiler[1:])[1])
+            samples['imports'].append(total)
+            for name, us in top_level.items():
+                modules.setdefault(name, []).append(us)
+            samples['bare_imports'].append(
+                parse_importtime(_run(interpreter[:1] + ['-X', 'importtime'] + interpreter[1:])[1])[0]
+            )
+    finally:
+        os.remove(path)
+
+    result = {name: median(values) for name, values in samples.items()}
+    result['overhead_imports'] = result['imports'] - result['bare_imports']
+    result['modules'] = {name: median(values) for name, values in modules.items()}
+    return result
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(prog='benchmarks.startup')
+    arg_parser.add_argument('--runs', type=int, default=10)
+    arg_parser.add_argument('--budget-ms', type=float,
+                            help='Fail if the compiler\'s own import time (median, '
+                                 'bare interpreter subtracted) exceeds this.')
+    arg_parser.add_argument('--top', type=int, default=10,
+                            help='Number of slowest top level imports to list.')
+    args = arg_parser.parse_args(argv)
+
+    result = measure(args.runs)
+    print(f'wall time  : {result["wall"] * 1000:8.2f} ms '
+          f'(bare interpreter {result["bare_wall"] * 1000:.2f} ms)')
+    print(f'import time: {result["imports"] / 1000:8.2f} ms '
+          f'(bare interpreter {result["bare_imports"] / 1000:.2f} ms, '
+          f'compiler {result["overhead_imports"] / 1000:.2f} ms)')
+    slowest = sorted(result['modules'].items(), key=lambda item: item[1], reverse=True)
+    for name, us in slowest[:args.top]:
+        print(f'  {name:<28} {us / 1000:8.2f} ms')
+
+    if args.budget_ms is not None and result['overhead_imports'] / 1000 > args.budget_ms:
+        print(f'[Benchmark-Regression] - startup imports take '
+              f'{result["overhead_imports"] / 1000:.2f} ms, budget is {args.budget_ms:.2f} ms')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
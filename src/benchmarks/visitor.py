@@ -0,0 +1,111 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Benchmarks the fused pass manager (\sa parse/visitor.py) on a generated
+program: the standard analyses (\sa parse/analysis.py) run one walk each,
+fused into a single walk, and as recursive visitors dispatching through a
+getattr() per node (how a hand-written walk would usually look).
+Usage: python -m benchmarks.visitor --scales 10000,100000 [--repeat 3] [--seed 0]'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '.'
+# ===================================
+# Imports
+# ===================================
+from benchmarks.generator import generate_source
+from tokenization.AstroFile import AstroFile
+from tokenization.Tokenizer import Tokenizer
+from parse.parser import Parser
+from parse.visitor import PassManager, children_getter
+from parse.analysis import NodeStats, SymbolCollector, CallValidator
+import argparse
+import time
+import sys
+
+# Pass factories, called with the parser of the walked AST
+PASSES = (lambda parser: NodeStats(), lambda parser: SymbolCollector(), CallValidator)
+
+
+def _naive(pass_, ast: list):
+    '''Recursive walk, the handler is looked up by name on every node.'''
+    def walk(node):
+        name = type(node).__name__
+        visit = getattr(pass_, f'visit_{name}', None) or getattr(pass_, 'visit_ExprAST', None) \
+            if name != 'list' else getattr(pass_, 'visit_list', None)
+        if visit is not None:
+            visit(node)
+        getter = children_getter(type(node))
+        if getter is not None:
+            for child in reversed(getter(node)):
+                walk(child)
+        leave = getattr(pass_, f'leave_{name}', None) or getattr(pass_, 'leave_ExprAST', None) \
+            if name != 'list' else None
+        if leave is not None:
+            leave(node)
+
+    pass_.begin()
+    for expr in ast:
+        walk(expr)
+    return pass_.result()
+
+
+def _separate(ast: list, parser: Parser):
+    return [PassManager([make(parser)]).run(ast) for make in PASSES]
+
+
+def _fused(ast: list, parser: Parser):
+    return PassManager([make(parser) for make in PASSES]).run(ast)
+
+
+def _naive_all(ast: list, parser: Parser):
+    return [_naive(make(parser), ast) for make in PASSES]
+
+
+def _best_of(func, ast: list, parser: Parser, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(ast, parser)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_scale(lines: int, repeat: int = 3, seed: int = 0):
+    parser = Parser(Tokenizer(AstroFile.from_source(generate_source(lines, seed))).tokenize())
+    ast = parser.parse()
+
+    fused = _fused(ast, parser)
+    separate = {name: result for results in _separate(ast, parser) for name, result in results.items()}
+    assert fused == separate, 'fused passes disagree with separate walks'
+    assert list(fused.values()) == _naive_all(ast, parser), 'fused passes disagree with the naive walks'
+
+    timings = {
+        'naive, a walk per pass': _best_of(_naive_all, ast, parser, repeat),
+        'a walk per pass': _best_of(_separate, ast, parser, repeat),
+        'fused, single walk': _best_of(_fused, ast, parser, repeat),
+    }
+    single = _best_of(lambda ast, parser: PassManager([NodeStats()]).run(ast), ast, parser, repeat)
+
+    print(f'source : {lines} lines, {fused["stats"]["nodes"]} nodes, {len(PASSES)} passes')
+    for name, seconds in timings.items():
+        print(f'{name:<23}: {seconds * 1000:9.2f} ms')
+    print(f'{"NodeStats alone":<23}: {single * 1000:9.2f} ms')
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(prog='benchmarks.visitor')
+    arg_parser.add_argument('--scales', default='100000',
+                            help='Comma separated program sizes in lines.')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    for scale in (int(s) for s in args.scales.split(',')):
+        run_scale(scale, args.repeat, args.seed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the on-disk compilation cache, which stores the token stream
+and the parsed AST of a source keyed by its content hash.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from tokenization.TokenDump import dump_binary, load_binary
+from tokenization.Tokens import TokenBuffer
+from parse.serialize import dump_ast, load_ast
+from parse.parser import Declaration, DeclarationIndex
+from parse.ast import DeclExprAST
+from typing import List, NamedTuple
+import _thread
+import hashlib
+import struct
+import zlib
+import os
+
+# Front-end modules whose code makes up the compiler version, editing any
+# of them invalidates every cache entry.
+_FRONTEND_MODULES = (
+    'tokenization/AstroFile.py',
+    'tokenization/Tokenizer.py',
+    'tokenization/Tokens.py',
+    'tokenization/Symbols.py',
+    'tokenization/TokenDump.py',
+    'parse/ast.py',
+    'parse/cursor.py',
+    'parse/parser.py',
+    'parse/serialize.py',
+)
+
+ENTRY_MAGIC = b'ASXC'
+ENTRY_VERSION = 3
+ENTRY_SUFFIX = '.asxc'
+_ENTRY_HEADER = struct.Struct('<4sHQQ')
+_DECLARATION = struct.Struct('<IIII')  # arity, line, col, name size
+
+_compiler_version = None
+
+
+def compiler_version() -> str:
+    '''Returns the fingerprint of the front-end code (computed once).'''
+    global _compiler_version
+    if _compiler_version is None:
+        digest = hashlib.sha256(f'{ENTRY_VERSION}'.encode())
+        root = os.path.dirname(os.path.abspath(__file__))
+        for module in _FRONTEND_MODULES:
+            with open(os.path.join(root, module), 'rb') as f:
+                digest.update(f.read())
+        _compiler_version = digest.hexdigest()[:16]
+    return _compiler_version
+
+
+class CacheEntry(NamedTuple):
+    '''A cached compile, \sa CompileCache.get.'''
+    tokens: TokenBuffer
+    ast: List
+    declarations: DeclarationIndex
+
+
+def _dump_declarations(declarations: dict) -> bytes:
+    '''Returns the declaration index (\sa Parser.declarations) as records of
+    @member _DECLARATION, each followed by the utf-8 name.'''
+    parts = []
+    for decl in declarations.values():
+        name = decl.name.encode()
+        parts.append(_DECLARATION.pack(decl.arity, decl.line, decl.col, len(name)))
+        parts.append(name)
+    return b''.join(parts)
+
+
+def _load_declarations(data, ast: List) -> DeclarationIndex:
+    '''Loads the records of @method _dump_declarations, the declarations are
+    linked to their (last, \sa Parser._declare) node in @param ast.'''
+    nodes = {node.name: node for node in ast if type(node) is DeclExprAST}
+    declarations = []
+    pos = 0
+    while pos < len(data):
+        arity, line, col, size = _DECLARATION.unpack_from(data, pos)
+        pos += _DECLARATION.size
+        name = str(data[pos:pos + size], 'utf-8')
+        if len(name.encode()) != size:
+            raise ValueError('truncated declaration index')
+        pos += size
+        declarations.append(Declaration(name, None, arity, line, col, nodes.get(name)))
+    return DeclarationIndex(declarations)
+
+
+class CompileCache:
+    '''Content-hash keyed on-disk cache of token streams, ASTs & declaration
+    indices. Entries are single zlib compressed files (binary token dump +
+    binary AST, \sa parse/serialize.py + declarations), all decoded iteratively & without running any
+    code stored in the entry, corrupt entries count as misses,
+    the least recently used ones are evicted once @member max_bytes or
+    @member max_entries is exceeded. Instances may be shared between threads
+    (\sa server/daemon.py), index & statistics are guarded by @member _lock.'''
+    def __init__(self, directory: str = '.astro_cache', max_bytes: int = 256 << 20,
+                 max_entries: int = 4096):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        # Statistics (of this instance)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._index = None  # key => [size, last use], loaded lazily
+        self._lock = _thread.allocate_lock()
+
+    @staticmethod
+    def key(source: bytes) -> str:
+        '''Returns the cache key of the raw source bytes.'''
+        digest = hashlib.sha256(compiler_version().encode())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def _load_index(self) -> dict:
+        '''Returns the index, @member _lock must be held.'''
+        if self._index is None:
+            self._index = {}
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    stat = entry.stat()
+                    self._index[entry.name[:-len(ENTRY_SUFFIX)]] = [stat.st_size, stat.st_mtime]
+        return self._index
+
+    def get(self, key: str) -> CacheEntry | None:
+        '''Returns the cached compile of @param key, None on a miss.'''
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = zlib.decompress(f.read())
+            magic, version, tokens_size, ast_size = _ENTRY_HEADER.unpack_from(data)
+            if magic != ENTRY_MAGIC or version != ENTRY_VERSION:
+                raise ValueError(f'stale cache entry {path}')
+
+            start = _ENTRY_HEADER.size
+            ast_start = start + tokens_size
+            view = memoryview(data)
+            tokens = load_binary(view[start:ast_start])
+            ast = load_ast(view[ast_start:ast_start + ast_size])
+            declarations = _load_declarations(view[ast_start + ast_size:], ast)
+        except (OSError, ValueError, KeyError, IndexError, zlib.error, struct.error):
+            # Missing, stale or corrupt (e.g. truncated) entries
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Mark as recently used (LRU eviction order)
+        with self._lock:
+            try:
+                os.utime(path)
+                if self._index is not None and key in self._index:
+                    self._index[key][1] = os.stat(path).st_mtime
+            except FileNotFoundError:
+                pass  # evicted in the meantime, the entry was read already
+            self.hits += 1
+        return CacheEntry(tokens, ast, declarations)
+
+    def put(self, key: str, tokens: TokenBuffer, ast: List, declarations: dict):
+        '''Stores the tokens, AST & declaration index (\sa Parser.declarations)
+        of @param key, evicts old entries if needed.'''
+        token_data = dump_binary(tokens)
+        ast_data = dump_ast(ast)
+        data = zlib.compress(
+            _ENTRY_HEADER.pack(ENTRY_MAGIC, ENTRY_VERSION, len(token_data), len(ast_data))
+            + token_data
+            + ast_data
+            + _dump_declarations(declarations),
+            1,
+        )
+
+        # Written to a temporary file (per process & thread) first, so
+        # concurrent compiles never read half written entries.
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{_thread.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            index = self._load_index()
+            index[key] = [len(data), os.stat(path).st_mtime]
+            self.writes += 1
+            self._evict()
+
+    def _evict(self):
+        '''Removes the least recently used entries, @member _lock must be held.'''
+        index = self._load_index()
+        total = sum(size for size, _ in index.values())
+        if total <= self.max_bytes and len(index) <= self.max_entries:
+            return
+
+        for key, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes and len(index) <= self.max_entries:
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            del index[key]
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'writes': self.writes,
+            'evictions': self.evictions,
+        }
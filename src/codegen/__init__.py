@@ -0,0 +1,12 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the code generation stage, which lowers the parsed AST.
+@module llvm_ir => streaming textual LLVM IR emitter, \sa __main__ --emit-llvm
+Note: No LLVM toolchain (or binding) is needed to generate the IR, it's
+      plain text which llvm-as/llc/clang can pick up from there.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
@@ -0,0 +1,327 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the textual LLVM IR emitter. Top-level expressions are fed in
+one by one (\sa Parser.iter_parse) and every function is written to the
+output as soon as it is complete, so the module is never held in memory,
+only the function currently being lowered is.
+Lowering (every value is an i64):
+    !name(a, b):     => define i64 @name(i64, i64), the arguments live in
+                        allocas, the expressions up to the next declaration
+                        make up the body, the last one is returned
+    name(args)       => call i64 @name(...), functions that are never
+                        defined are declared at the end of the module
+    name             => argument, otherwise a module global (i64 0 initially)
+    name = expr      => store, the value of expr is the value of the assignment
+    (a, b, ...)      => evaluated in order, the last value is the list's value
+    + - * / % < >    => add sub mul sdiv srem, icmp slt/sgt (zext to i64)
+Expressions in front of the first declaration end up in @"astro:init".
+Note: Minimum LLVM version is 15, the IR uses opaque pointers (ptr). LLVM 14
+      only reads it with -opaque-pointers (e.g. llvm-as -opaque-pointers),
+      LLVM 13 and older can't read it at all.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from typing import Iterable, NamedTuple, TextIO
+from parse.ast import VarExprAST, NumExprAST, BinExprAST, CallExprAST, DeclExprAST, FuncExprAST
+from parse.optimize import i64_value
+from utils import ColorFormat as Coloring
+from utils import colored_out as asxout
+import re
+import sys
+
+# Module level symbols, ':' can't be part of an Astro name (\sa Tokenizer.PUNCT_MAP),
+# so these never collide with a function of the program
+INIT_FUNCTION = 'astro:init'
+GLOBAL_PREFIX = 'var:'
+
+ARITHMETIC = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'sdiv', '%': 'srem'}
+COMPARISON = {'<': 'slt', '>': 'sgt'}
+
+_BARE_IDENT = re.compile(r'[-a-zA-Z$._][-a-zA-Z$._0-9]*\Z')
+
+
+def escape(text: str) -> str:
+    '''Returns @param text for use in an LLVM string/quoted identifier,
+    everything outside of printable ASCII (and '"', '\\') is hex escaped.'''
+    return ''.join(
+        chr(byte) if 0x20 <= byte < 0x7F and byte not in (0x22, 0x5C) else f'\\{byte:02X}'
+        for byte in text.encode()
+    )
+
+
+def quote(name: str) -> str:
+    '''Returns @param name as LLVM identifier (without its @/% sigil), names
+    that aren't valid bare identifiers are quoted & escaped.'''
+    if _BARE_IDENT.match(name):
+        return name
+    return f'"{escape(name)}"'
+
+
+def constant(digits: str) -> str:
+    '''Returns the number literal @param digits as i64 constant, literals
+    out of range wrap around (two's complement).'''
+    return str(i64_value(digits))
+
+
+class IRStats(NamedTuple):
+    '''Counts of an emitted module, \sa IREmitter.close.'''
+    functions: int
+    declarations: int
+    globals: int
+    instructions: int
+    chars: int
+
+
+class IREmitter:
+    '''Streams the LLVM IR of a module to @member out (any text stream, give
+    it a buffered one, \sa emit_ir), a write per function.
+    Usage:
+        with IREmitter(sys.stdout, 'main.astro') as emitter:
+            for expr in Parser(tokenizer.stream()).iter_parse():
+                emitter.emit(expr)'''
+    def __init__(self, out: TextIO, source_name: str = '<source>', target_triple: str = None):
+        self.out = out
+        self.defined = set()    # names of the emitted functions
+        self.called = {}        # callee => arity of its first call
+        self.globals = set()    # Astro names of the emitted globals
+        self.functions = 0
+        self.instructions = 0
+        self.chars = 0
+        self._closed = False
+
+        # State of the function being lowered, \sa _begin
+        self._lines = None
+        self._locals = None
+        self._new_globals = None
+        self._next = 0
+        self._result = '0'
+        self._idents = {}
+
+        header = [f"; ModuleID = '{escape(source_name)}'",
+                  f'source_filename = "{escape(source_name)}"']
+        if target_triple:
+            header.append(f'target triple = "{target_triple}"')
+        self._write('\n'.join(header) + '\n\n')
+
+    def _write(self, text: str):
+        self.out.write(text)
+        self.chars += len(text)
+
+    def _ident(self, name: str) -> str:
+        ident = self._idents.get(name)
+        if ident is None:
+            ident = self._idents[name] = quote(name)
+        return ident
+
+    def emit(self, expr):
+        '''Lowers the top-level expression @param expr, a declaration
+        finishes (and writes) the function before it.'''
+        if isinstance(expr, FuncExprAST):
+            expr = expr.declaration  # its content isn't parsed (yet)
+        if isinstance(expr, DeclExprAST):
+            self._finish()
+            self._begin(expr.name, expr.args)
+            return
+
+        if self._lines is None:
+            self._begin(INIT_FUNCTION, [])
+        self._result = self._lower(expr)
+
+    def emit_all(self, expressions: Iterable) -> 'IREmitter':
+        for expr in expressions:
+            self.emit(expr)
+        return self
+
+    def close(self) -> IRStats:
+        '''Writes the last function & the declarations of every function
+        that got called but never defined, @member out stays open.'''
+        if not self._closed:
+            self._finish()
+            undefined = [(name, arity) for name, arity in self.called.items()
+                         if name not in self.defined]
+            if undefined:
+                self._write(''.join(
+                    f'declare i64 @{self._ident(name)}({", ".join(["i64"] * arity)})\n'
+                    for name, arity in undefined
+                ))
+            self._closed = True
+        return self.stats()
+
+    def stats(self) -> IRStats:
+        return IRStats(self.functions, len(self.called.keys() - self.defined),
+                       len(self.globals), self.instructions, self.chars)
+
+    def __enter__(self) -> 'IREmitter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _begin(self, name: str, args: list):
+        '''Opens the function @param name, its arguments are spilled into
+        allocas (named after them) so assignments to them just work.'''
+        if name in self.defined:
+            unique = 1
+            while f'{name}:{unique}' in self.defined:
+                unique += 1
+            asxout(
+                Coloring.src_warning, 'Codegen',
+                f'Function [\'{name}\'] is defined more than once, emitted as [\'{name}:{unique}\'].'
+            )
+            name = f'{name}:{unique}'
+        self.defined.add(name)
+
+        params = ', '.join(['i64'] * len(args))
+        lines = [f'define i64 @{self._ident(name)}({params}) {{', 'entry:']
+        self._locals = {}
+        for index, arg in enumerate(args):
+            # Anything but a plain name (or a repeated one) is an unnamed argument
+            if isinstance(arg, VarExprAST) and arg.value not in self._locals:
+                local = self._locals[arg.value] = f'%{self._ident(arg.value)}'
+                lines.append(f'  {local} = alloca i64')
+                lines.append(f'  store i64 %{index}, ptr {local}')
+        self.instructions += 2 * len(self._locals)
+
+        self._lines = lines
+        self._new_globals = []
+        self._next = len(args)
+        self._result = '0'
+
+    def _finish(self):
+        '''Writes the open function (preceded by the globals it introduced).'''
+        if self._lines is None:
+            return
+        lines = self._lines
+        lines.append(f'  ret i64 {self._result}')
+        lines.append('}\n\n')
+        self.instructions += 1
+        self.functions += 1
+
+        if self._new_globals:
+            lines[:0] = [f'@{self._ident(GLOBAL_PREFIX + name)} = global i64 0'
+                         for name in self._new_globals] + ['']
+        self._write('\n'.join(lines))
+        self._lines = self._locals = self._new_globals = None
+
+    def _address(self, name: str) -> str:
+        '''Returns the pointer to the variable @param name.'''
+        local = self._locals.get(name)
+        if local is not None:
+            return local
+        if name not in self.globals:
+            self.globals.add(name)
+            self._new_globals.append(name)
+        return f'@{self._ident(GLOBAL_PREFIX + name)}'
+
+    def _value(self) -> str:
+        value = f'%{self._next}'
+        self._next += 1
+        return value
+
+    def _lower(self, root) -> str:
+        '''Appends the instructions of @param root to the open function,
+        returns the IR value (constant or register) it evaluates to.
+        Post-order with an explicit stack (left to right, operands before
+        operators), so arbitrarily deep expressions don't hit the
+        recursion limit.'''
+        lines = self._lines
+        emitted = len(lines)
+        values = []
+        stack = [(root, False)]
+        while stack:
+            node, ready = stack.pop()
+            typ = type(node)
+
+            if typ is NumExprAST:
+                values.append(constant(node.value))
+                continue
+            if typ is VarExprAST:
+                value = self._value()
+                lines.append(f'  {value} = load i64, ptr {self._address(node.value)}')
+                values.append(value)
+                continue
+
+            if not ready:
+                stack.append((node, True))
+                if typ is list:
+                    stack.extend((item, False) for item in reversed(node))
+                elif typ is CallExprAST:
+                    stack.extend((arg, False) for arg in reversed(node.args))
+                elif typ is BinExprAST:
+                    if node.operator != '=':
+                        stack.append((node.rhs, False))
+                        stack.append((node.lhs, False))
+                    else:
+                        stack.append((node.rhs, False))
+                continue
+
+            if typ is list:
+                items = values[len(values) - len(node):]
+                del values[len(values) - len(node):]
+                values.append(items[-1] if items else '0')
+            elif typ is CallExprAST:
+                args = values[len(values) - len(node.args):]
+                del values[len(values) - len(node.args):]
+                self.called.setdefault(node.caller, len(args))
+                value = self._value()
+                lines.append(f'  {value} = call i64 @{self._ident(node.caller)}('
+                             f'{", ".join("i64 " + arg for arg in args)})')
+                values.append(value)
+            elif typ is BinExprAST:
+                values.append(self._binary(node, values))
+            else:
+                asxout(Coloring.src_warning, 'Codegen',
+                       f'{typ.__name__} can\'t be lowered here, evaluates to 0.')
+                values.append('0')
+
+        self.instructions += len(lines) - emitted
+        return values.pop()
+
+    def _binary(self, node: BinExprAST, values: list) -> str:
+        operator = node.operator
+        if operator == '=':
+            value = values.pop()
+            if type(node.lhs) is VarExprAST:
+                self._lines.append(f'  store i64 {value}, ptr {self._address(node.lhs.value)}')
+            else:
+                asxout(Coloring.src_warning, 'Codegen',
+                       f'Can\'t assign to {type(node.lhs).__name__}, the assignment is dropped.')
+            return value
+
+        rhs = values.pop()
+        lhs = values.pop()
+        instruction = ARITHMETIC.get(operator)
+        if instruction is not None:
+            result = self._value()
+            self._lines.append(f'  {result} = {instruction} i64 {lhs}, {rhs}')
+            return result
+
+        condition = COMPARISON.get(operator)
+        if condition is None:
+            asxout(Coloring.src_warning, 'Codegen', f'Unknown operator [\'{operator}\'], evaluates to 0.')
+            return '0'
+        flag, result = self._value(), self._value()
+        self._lines.append(f'  {flag} = icmp {condition} i64 {lhs}, {rhs}')
+        self._lines.append(f'  {result} = zext i1 {flag} to i64')
+        return result
+
+
+def emit_ir(expressions: Iterable, destination: str | TextIO, source_name: str = '<source>',
+            target_triple: str = None, buffer_size: int = 1 << 16) -> IRStats:
+    '''Lowers @param expressions (ideally lazily, \sa Parser.iter_parse) into
+    LLVM IR written to @param destination, a path ('-' for stdout) or a
+    text stream, paths are written through a @param buffer_size buffer.'''
+    if not isinstance(destination, str):
+        return IREmitter(destination, source_name, target_triple).emit_all(expressions).close()
+    if destination == '-':
+        stats = IREmitter(sys.stdout, source_name, target_triple).emit_all(expressions).close()
+        sys.stdout.flush()
+        return stats
+    with open(destination, 'w', encoding='ascii', buffering=buffer_size) as out:
+        return IREmitter(out, source_name, target_triple).emit_all(expressions).close()
@@ -0,0 +1,192 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the multi-file compile driver, which fans the
+AstroFile => Tokenizer => Parser pipeline out over a process pool.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, NamedTuple
+from tokenization.AstroFile import AstroFile
+from tokenization.Tokenizer import Tokenizer
+from parse.parser import Parser
+import _thread
+import glob
+import time
+import sys
+import io
+import os
+
+SOURCE_SUFFIX = '.astro'
+
+
+class CompileResult(NamedTuple):
+    '''Outcome of compiling a single file (picklable, sent back by workers).'''
+    path: str
+    ok: bool
+    lines: int
+    tokens: int
+    expressions: int
+    seconds: float
+    cached: bool
+    diagnostics: List[str]
+
+
+def collect_sources(targets: Iterable[str]) -> List[str]:
+    '''Expands files, directories (recursively, *.astro) and glob patterns
+    into a list of unique source paths, in the order they were given.'''
+    sources = {}
+    for target in targets:
+        if os.path.isdir(target):
+            found = sorted(glob.glob(os.path.join(target, '**', '*' + SOURCE_SUFFIX), recursive=True))
+        elif glob.has_magic(target):
+            found = sorted(glob.glob(target, recursive=True))
+        else:
+            found = [target]
+        for path in found:
+            sources.setdefault(os.path.normpath(path), None)
+    return list(sources)
+
+
+class _ThreadStdout:
+    '''sys.stdout stand-in routing the output of every capturing thread
+    (\sa capture_output) into that thread's buffer, everything else is
+    passed on to the wrapped @member stream.'''
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = _thread._local()
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self.local, 'buffer', None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+
+_INSTALL_LOCK = _thread.allocate_lock()
+
+
+@contextmanager
+def capture_output() -> Iterator[io.StringIO]:
+    '''Captures everything the current thread prints into the yielded
+    buffer. Unlike contextlib.redirect_stdout (which swaps sys.stdout for
+    the whole process) output of other threads is left alone, so front-end
+    runs can be captured concurrently (\sa aio.py, server/daemon.py).'''
+    with _INSTALL_LOCK:
+        proxy = sys.stdout
+        if not isinstance(proxy, _ThreadStdout):
+            proxy = sys.stdout = _ThreadStdout(proxy)
+
+    buffer = io.StringIO()
+    previous = getattr(proxy.local, 'buffer', None)
+    proxy.local.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        proxy.local.buffer = previous
+
+
+def _compile(path: str, load: Callable[[], AstroFile], cache_dir: str = None,
+             source: bytes = None) -> CompileResult:
+    '''Runs the front-end on the file returned by @param load. Everything the
+    pipeline outputs is captured as diagnostics, fatal errors (exit() calls)
+    and internal errors (with their traceback) fail the result instead of
+    terminating the process.
+    @param source content of @param path (for the cache key), read if None'''
+    lines = tokens = expressions = 0
+    cached = False
+    ok = True
+
+    start = time.perf_counter()
+    with capture_output() as output:
+        try:
+            cache = key = None
+            entry = None
+            if cache_dir is not None:
+                from cache import CompileCache
+                cache = CompileCache(cache_dir)
+                if source is None:
+                    with open(path, 'rb') as f:
+                        source = f.read()
+                key = cache.key(source)
+                entry = cache.get(key)
+
+            if entry is not None:
+                toks, ast = entry.tokens, entry.ast
+                cached = True
+            else:
+                with load() as h_file:
+                    toks = Tokenizer(h_file).tokenize()
+                    parser = Parser(toks)
+                    ast = parser.parse()
+                    if cache is not None:
+                        cache.put(key, toks, ast, parser.declarations)
+
+            lines, tokens, expressions = toks.line_count, len(toks), len(ast)
+        except SystemExit:
+            ok = False
+        except (OSError, UnicodeDecodeError) as e:
+            output.write(f'[Driver-Error] - {e}\n')
+            ok = False
+        except Exception:
+            # A front-end bug fails this file only, never the whole batch
+            import traceback
+            output.write(f'[Driver-Error] - internal compiler error:\n{traceback.format_exc()}')
+            ok = False
+
+    diagnostics = [line for line in output.getvalue().splitlines() if line.strip()]
+    return CompileResult(path, ok, lines, tokens, expressions,
+                         time.perf_counter() - start, cached, diagnostics)
+
+
+def compile_file(path: str, cache_dir: str = None, memory_map: bool = False) -> CompileResult:
+    '''Runs the front-end on @param path, \sa _compile.'''
+    return _compile(path, lambda: AstroFile(path, memory_map=memory_map), cache_dir)
+
+
+def compile_source(path: str, source: bytes, cache_dir: str = None) -> CompileResult:
+    '''Runs the front-end on the already read @param source (the content of
+    @param path, which is only used for output), \sa _compile.'''
+    return _compile(path, lambda: AstroFile.from_source(source.decode(), path), cache_dir, source)
+
+
+def compile_many(paths: List[str], workers: int = None, cache_dir: str = None,
+                 memory_map: bool = False) -> List[CompileResult]:
+    '''Compiles all @param paths on @param workers processes (os.cpu_count()
+    by default, 1 => in this process), results keep the order of the paths.'''
+    job = partial(compile_file, cache_dir=cache_dir, memory_map=memory_map)
+    if workers == 1 or len(paths) <= 1:
+        return [job(path) for path in paths]
+
+    # Imported on demand, the process pool machinery is slow to import
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    chunksize = max(1, len(paths) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(job, paths, chunksize=chunksize))
+
+
+def summarize(results: List[CompileResult], seconds: float) -> str:
+    '''Returns the overall throughput summary of a compile run.'''
+    failed = sum(not result.ok for result in results)
+    cached = sum(result.cached for result in results)
+    lines = sum(result.lines for result in results)
+    tokens = sum(result.tokens for result in results)
+    rate = lambda count: count / seconds if seconds else 0.0
+    return (
+        f'{len(results)} files ({failed} failed, {cached} cached), {lines} lines, '
+        f'{tokens} tokens in {seconds:.3f}s => {rate(len(results)):.1f} files/s, '
+        f'{rate(lines):,.0f} lines/s, {rate(tokens):,.0f} tokens/s'
+    )
@@ -0,0 +1,273 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the incremental session used by editor integrations, which
+re-lexes & re-parses only what a text edit actually touched.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from bisect import bisect_right
+from contextlib import redirect_stdout
+from typing import List, Tuple
+from tokenization.AstroFile import strip_line
+from tokenization.Tokenizer import lex_line
+from tokenization.Tokens import TokenType
+from tokenization.Symbols import SymbolTable
+from parse.ast import CallExprAST
+from parse.parser import Parser, Declaration
+from utils import ColorFormat as Coloring
+import io
+import re
+
+# Line context in parser output, \sa Parser._get_ctx
+_LINE_CTX = re.compile(r'@L\[(\d+)\]')
+
+
+class Construct:
+    '''A top-level construct: a declaration line (!name(args):) and all
+    lines up to the next one, or the prelude before the first declaration.
+    @member declarations the construct parser's declaration index (construct
+                         relative lines, \sa Parser.declarations)
+    @member previous     symbol => construct declaring it before this one
+    @member shifted      (first line, @member diagnostics made absolute for it)'''
+    __slots__ = ('line_count', 'nodes', 'diagnostics', 'declarations', 'previous', 'shifted')
+
+    def __init__(self, line_count: int):
+        self.line_count = line_count
+        self.nodes = []
+        self.diagnostics = []
+        self.declarations = {}
+        self.previous = {}
+        self.shifted = None
+
+
+class IncrementalSession:
+    '''Keeps the content, the per-line tokens & the parsed top-level constructs
+    of a single file. Edits (range + replacement) only re-lex the touched lines
+    (plus the lines a changed block comment state spills into) and only
+    re-parse the constructs containing them. Declarations are indexed across
+    constructs (@member declarations), so redeclarations are reported just
+    like a full parse reports them.
+    Note: Lines & columns are 0-based, ranges end exclusive (like LSP).'''
+    def __init__(self, content: str = ''):
+        self.raw_lines = content.split('\n')
+        self.clean_lines = []
+        self.block_state = []   # line starts inside a block comment
+        self.line_tokens = []   # List[List[Token]] per line
+        self.constructs = []
+        self.starts = []        # first line per construct (prefix sums of the line counts)
+        self.symbols = SymbolTable()  # shared by every construct's parser
+        self.declarations = {}        # symbol => [Construct, ...] declaring it, in order
+
+        in_block = False
+        for line in self.raw_lines:
+            self.block_state.append(in_block)
+            clean, in_block = strip_line(line, in_block)
+            self.clean_lines.append(clean)
+            self.line_tokens.append(lex_line(clean))
+
+        self.constructs = self._partition(0, len(self.raw_lines))
+        line = 0
+        for construct in self.constructs:
+            self.starts.append(line)
+            self._parse(construct, line)
+            line += construct.line_count
+        self._index([], self.constructs)
+
+    @classmethod
+    def from_file(cls, file_name: str) -> 'IncrementalSession':
+        with open(file_name, 'r') as f:
+            return cls(f.read())
+
+    @property
+    def content(self) -> str:
+        return '\n'.join(self.raw_lines)
+
+    @property
+    def ast(self) -> list:
+        '''Top-level expressions of the whole file.'''
+        return [node for construct in self.constructs for node in construct.nodes]
+
+    @property
+    def diagnostics(self) -> List[str]:
+        '''Parser output of all constructs. Constructs are parsed with
+        construct relative line numbers (so untouched constructs stay valid
+        when lines are inserted above them), which are made absolute here
+        (once per construct & first line, \sa Construct.shifted).
+        Redeclarations across constructs are reported in front of the
+        redeclaring construct's output, \sa Parser._declare.'''
+        diagnostics = []
+        firsts = {}  # declaring construct => first line
+        for construct, first in zip(self.constructs, self.starts):
+            if construct.declarations:
+                firsts[construct] = first
+            for symbol, previous in construct.previous.items():
+                decl = construct.declarations[symbol]
+                earlier = previous.declarations[symbol]
+                diagnostics.append(Coloring.src_warning(
+                    'ParseDeclExpr',
+                    f'Redeclaration of [\'{decl.name}\'] (first declared '
+                    f'@L[{firsts[previous] + earlier.line + 1}], @C[{earlier.col + 1}]); '
+                    f'@L[{first + decl.line + 1}], @C[{decl.col + 1}]'
+                ))
+            shifted = construct.shifted
+            if shifted is None or shifted[0] != first:
+                shift = lambda match: f'@L[{int(match.group(1)) + first}]'
+                shifted = construct.shifted = (
+                    first, [_LINE_CTX.sub(shift, msg) for msg in construct.diagnostics]
+                )
+            diagnostics.extend(shifted[1])
+        return diagnostics
+
+    def resolve(self, call: CallExprAST) -> Declaration | None:
+        '''Returns the declaration (absolute line) @param call refers to, the
+        last one of its name like after a full parse (\sa Parser.resolve),
+        None if there is no such declaration.'''
+        symbol = self.symbols.lookup(call.caller)
+        constructs = self.declarations.get(symbol) if symbol is not None else None
+        if not constructs:
+            return None
+        construct = constructs[-1]
+        decl = construct.declarations[symbol]
+        first = next(first for other, first in zip(self.constructs, self.starts)
+                     if other is construct)
+        return Declaration(decl.name, symbol, decl.arity, first + decl.line, decl.col, decl.node)
+
+    def edit(self, start_line: int, start_col: int, end_line: int, end_col: int,
+             text: str) -> Tuple[int, int]:
+        '''Replaces the given range with @param text.
+        Returns the number of re-lexed lines & re-parsed constructs.'''
+        prefix = self.raw_lines[start_line][:start_col]
+        suffix = self.raw_lines[end_line][end_col:]
+        new_lines = (prefix + text + suffix).split('\n')
+        removed = end_line - start_line + 1
+        delta = len(new_lines) - removed
+
+        # The state entering the first edited line can't change (its prefix didn't)
+        in_block = self.block_state[start_line]
+
+        self.raw_lines[start_line:end_line + 1] = new_lines
+        self.clean_lines[start_line:end_line + 1] = [''] * len(new_lines)
+        self.line_tokens[start_line:end_line + 1] = [[] for _ in new_lines]
+        self.block_state[start_line:end_line + 1] = [False] * len(new_lines)
+
+        # Re-lex the edited lines, then keep going as long as the block
+        # comment state entering the next line changed.
+        line = start_line
+        stop = start_line + len(new_lines)
+        while line < len(self.raw_lines) and (line < stop or self.block_state[line] != in_block):
+            self.block_state[line] = in_block
+            clean, in_block = strip_line(self.raw_lines[line], in_block)
+            if line >= stop and clean == self.clean_lines[line]:
+                line += 1
+                continue
+            self.clean_lines[line] = clean
+            self.line_tokens[line] = lex_line(clean)
+            line += 1
+        dirty_end = line
+
+        return dirty_end - start_line, self._reparse(start_line, dirty_end, removed, delta)
+
+    def _construct_at(self, line: int) -> Tuple[int, int]:
+        '''Returns (construct index, first line) of the construct holding
+        @param line (the last one past the end), a bisection of @member starts.'''
+        index = max(bisect_right(self.starts, line) - 1, 0)
+        return index, self.starts[index]
+
+    def _reparse(self, start: int, end: int, removed: int, delta: int) -> int:
+        '''Re-partitions & re-parses the constructs touching lines [start, end),
+        @param removed lines (before the edit) were replaced, shifting by @param delta.'''
+        first_index, first_line = self._construct_at(start)
+        # A removed declaration merges its lines into the previous construct
+        if first_index and not self._is_decl(first_line):
+            first_index -= 1
+            first_line = self.starts[first_index]
+
+        # Constructs up to the one holding the last touched (old) line
+        old_end = max(end - delta, start + removed)
+        last_index, last_line = self._construct_at(old_end - 1)
+        stop_line = last_line + self.constructs[last_index].line_count + delta
+        stop_line = max(stop_line, end)
+
+        constructs = self._partition(first_line, stop_line)
+        starts = []
+        line = first_line
+        for construct in constructs:
+            starts.append(line)
+            self._parse(construct, line)
+            line += construct.line_count
+
+        removed = self.constructs[first_index:last_index + 1]
+        self.constructs[first_index:last_index + 1] = constructs
+        self.starts[first_index:last_index + 1] = starts
+        if delta:
+            # The constructs behind the edit only move
+            tail = first_index + len(starts)
+            self.starts[tail:] = [start + delta for start in self.starts[tail:]]
+        self._index(removed, constructs)
+        return len(constructs)
+
+    def _index(self, removed: List[Construct], added: List[Construct]):
+        '''Updates the declaration index after @param removed got replaced by
+        @param added, only the symbols they declare are touched.'''
+        symbols = {symbol for construct in removed + added for symbol in construct.declarations}
+        positions = None
+        for symbol in symbols:
+            declaring = [construct for construct in self.declarations.get(symbol, ())
+                         if construct not in removed]
+            new = [construct for construct in added if symbol in construct.declarations]
+            if declaring and new:
+                # Redeclared, the order is only looked up in this (rare) case
+                if positions is None:
+                    positions = {construct: index for index, construct in enumerate(self.constructs)}
+                declaring = sorted(declaring + new, key=positions.__getitem__)
+            else:
+                declaring += new
+            if not declaring:
+                del self.declarations[symbol]
+                continue
+            self.declarations[symbol] = declaring
+            declaring[0].previous.pop(symbol, None)
+            for previous, construct in zip(declaring, declaring[1:]):
+                construct.previous[symbol] = previous
+
+    def _is_decl(self, line: int) -> bool:
+        for tok in self.line_tokens[line]:
+            if tok.id != TokenType.SPACE:
+                return tok.id == TokenType.EXCL
+        return False
+
+    def _partition(self, start: int, stop: int) -> List[Construct]:
+        '''Splits lines [start, stop) into constructs at declaration lines.'''
+        constructs = []
+        for line in range(start, stop):
+            if not constructs or self._is_decl(line):
+                constructs.append(Construct(0))
+            constructs[-1].line_count += 1
+        return constructs
+
+    def _parse(self, construct: Construct, first_line: int):
+        '''Parses a single construct, its output is kept as diagnostics.'''
+        tokens = []
+        for line in range(first_line, first_line + construct.line_count):
+            for tok in self.line_tokens[line]:
+                tok.line = line - first_line
+                tokens.append(tok)
+
+        output = io.StringIO()
+        parser = Parser(tokens, symbols=self.symbols)
+        construct.nodes = []
+        try:
+            with redirect_stdout(output):
+                construct.nodes = parser.parse()
+        except SystemExit:
+            pass
+        construct.declarations = parser.declarations
+        construct.previous = {}
+        construct.shifted = None
+        construct.diagnostics = [msg for msg in output.getvalue().splitlines() if msg.strip()]
@@ -0,0 +1,135 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the standard analysis passes (\sa visitor.py), every one of
+them can be fused with the others into a single walk:
+@class NodeStats       => node counts per class & nesting depth
+@class SymbolCollector => declarations, referenced variables & callees
+@class CallValidator   => calls to undeclared functions, arity mismatches
+                          and assignments to anything but a name'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from collections import Counter
+from typing import List
+from parse.ast import ExprAST, VarExprAST, BinExprAST, CallExprAST, DeclExprAST
+from parse.visitor import Pass
+
+
+class NodeStats(Pass):
+    '''Counts the nodes per class name (@member counts) & lists, tracks the
+    deepest nesting of nodes (@member max_depth).'''
+    name = 'stats'
+
+    def begin(self):
+        self.counts = Counter()
+        self.lists = 0
+        self.depth = 0
+        self.max_depth = 0
+
+    def visit_ExprAST(self, node: ExprAST):
+        self.counts[type(node).__name__] += 1
+        self.depth += 1
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+
+    def leave_ExprAST(self, node: ExprAST):
+        self.depth -= 1
+
+    def visit_list(self, node: list):
+        self.lists += 1
+
+    @property
+    def nodes(self) -> int:
+        return sum(self.counts.values())
+
+    def result(self) -> dict:
+        return {'counts': dict(self.counts), 'nodes': self.nodes, 'lists': self.lists,
+                'max_depth': self.max_depth}
+
+
+class SymbolCollector(Pass):
+    '''Collects the names a program declares & uses.
+    @member declarations (name, arity) of every declaration, in order
+    @member variables    referenced names => number of references
+    @member calls        callee => number of calls'''
+    name = 'symbols'
+
+    def begin(self):
+        self.declarations = []
+        self.variables = Counter()
+        self.calls = Counter()
+        self._in_declaration = False
+
+    def visit_DeclExprAST(self, node: DeclExprAST):
+        self.declarations.append((node.name, len(node.args)))
+        # The arguments are names as well, but not references
+        self._in_declaration = True
+
+    def leave_DeclExprAST(self, node: DeclExprAST):
+        self._in_declaration = False
+
+    def visit_VarExprAST(self, node: VarExprAST):
+        if not self._in_declaration:
+            self.variables[node.value] += 1
+
+    def visit_CallExprAST(self, node: CallExprAST):
+        self.calls[node.caller] += 1
+
+    def result(self) -> dict:
+        return {'declarations': self.declarations, 'variables': dict(self.variables),
+                'calls': dict(self.calls)}
+
+
+class CallValidator(Pass):
+    '''Reports calls which don't match a declaration (calls may come before
+    the declaration, hence the check once everything got walked) and
+    assignments to anything but a name. Callees are looked up through the
+    declaration index of @param resolver (the Parser, IncrementalSession or
+    DeclarationIndex of the walked AST, \sa Parser.resolve). Builtins (e.g. print) are called
+    without being declared, @param known names them.'''
+    name = 'validation'
+
+    def __init__(self, resolver, known: tuple = ()):
+        self.resolver = resolver
+        self.known = set(known)
+
+    def begin(self):
+        self.calls = {}         # callee => {arity: count}
+        self.callers = {}       # callee => a call of it (\sa resolve)
+        self.assignments = []   # messages
+
+    def visit_CallExprAST(self, node: CallExprAST):
+        arities = self.calls.get(node.caller)
+        if arities is None:
+            arities = self.calls[node.caller] = {}
+            self.callers[node.caller] = node
+        arities[len(node.args)] = arities.get(len(node.args), 0) + 1
+
+    def visit_BinExprAST(self, node: BinExprAST):
+        if node.operator == '=' and type(node.lhs) is not VarExprAST:
+            self.assignments.append(
+                f'Assignment to {type(node.lhs).__name__} has no effect.'
+            )
+
+    def result(self) -> List[str]:
+        issues = []
+        for callee, arities in self.calls.items():
+            declaration = self.resolver.resolve(self.callers[callee])
+            if declaration is None:
+                if callee not in self.known:
+                    issues.append(f'Call of undeclared function [\'{callee}\'] '
+                                  f'({sum(arities.values())}x).')
+                continue
+            for arity, count in sorted(arities.items()):
+                if arity != declaration.arity:
+                    issues.append(
+                        f'Call of [\'{callee}\'] with {arity} argument(s) ({count}x), declared '
+                        f'with {declaration.arity} @L[{declaration.line + 1}], @C[{declaration.col + 1}].'
+                    )
+        return issues + self.assignments
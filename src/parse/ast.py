@@ -16,29 +16,45 @@ from utils import ClassUtils
 #! Base Class
 class ExprAST(ClassUtils):
     '''The abstract base class inheriting into all
-    expressionistic AST subclasses.'''
-    pass
+    expressionistic AST subclasses.
+    Note: Every node declares its fields as __slots__ (no per-node __dict__),
+          which also makes up its repr, \sa utils.py@ClassUtils.'''
+    __slots__ = ()
 
 class VarExprAST(ExprAST):
     '''A expression subclass for referencing variable names.'''
+    __slots__ = ('value',)
+
     def __init__(self, value: str):  
         self.value = value
 
 
 class NumExprAST(ExprAST):
     '''A expression subclass for number literals.'''
+    __slots__ = ('value',)
+
     def __init__(self, value: int):
         self.value = value
 
 
 class BinExprAST(ExprAST):
     '''A expression subclass for binary operators'''
-    def __init__(self, operator: str):
+    __slots__ = ('operator', 'lhs', 'rhs')
+
+    def __init__(self, operator: str, lhs: ExprAST, rhs: ExprAST):
+        '''Members:
+        @member operator - Operator symbol (\sa parser.py@BINARY_OPERATORS)
+        @member lhs      - Left hand side operand
+        @member rhs      - Right hand side operand'''
         self.operator = operator
+        self.lhs = lhs
+        self.rhs = rhs
 
 
 class CallExprAST(ExprAST):
     '''A expression subclass for function calls.'''
+    __slots__ = ('caller', 'args')
+
     def __init__(self, caller: str, args: list):
         '''Members:
         @member caller - Name of function being called
@@ -49,6 +65,8 @@ class CallExprAST(ExprAST):
 
 class DeclExprAST(ExprAST):
     '''A expression subclass for function declarations.'''
+    __slots__ = ('name', 'args')
+
     def __init__(self, name: str, args: list):
         '''Members:
         @member name - Name of function
@@ -59,8 +77,26 @@ class DeclExprAST(ExprAST):
 
 class FuncExprAST(ExprAST):
     '''A expression subclass for function definitions.'''
+    __slots__ = ('declaration', 'content')
+
     def __init__(self, declaration: DeclExprAST, content: str):
         # Declaration may not be seperate
         self.declaration = declaration 
         self.content = content
 
+
+
+def iter_nodes(nodes):
+    '''Yields every node of @param nodes (a node or a list of them) in
+    pre-order, iteratively so arbitrarily deep trees don't hit the
+    recursion limit. Lists of nodes are walked, but not yielded.'''
+    stack = [nodes]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, ExprAST):
+            yield node
+            fields = [getattr(node, field) for field in type(node).__slots__]
+            stack.extend(reversed([value for value in fields
+                                   if isinstance(value, (list, ExprAST))]))
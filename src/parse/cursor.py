@@ -0,0 +1,74 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the token cursor the parser consumes its input through.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '.'
+# ===================================
+# Imports
+# ===================================
+from typing import Iterable, Iterator
+from tokenization.Tokens import TokenType, Token, TokenBuffer, EOF_TOKEN
+
+
+class TokenCursor:
+    '''O(1) cursor over a single flat token sequence (TokenBuffer or token
+    stream) with k-token lookahead. Looked-ahead tokens are kept in a small
+    ring buffer, tokens of the @param skip types are filtered out lazily
+    while reading, the input is never copied.'''
+    __slots__ = ('_source', '_ring', '_mask', '_head', '_count')
+
+    def __init__(self, token_input: TokenBuffer | Iterable[Token],
+                 skip: Iterable[int] = (TokenType.SPACE,), lookahead: int = 4):
+        '''Parameters:
+        @token_input Tokens to walk over.
+        @skip        Token types which are never returned.
+        @lookahead   Maximum k supported by @method peek.'''
+        size = 1
+        while size < lookahead:
+            size <<= 1
+
+        self._source = _filter(token_input, frozenset(skip))
+        self._ring = [EOF_TOKEN] * size
+        self._mask = size - 1
+        self._head = 0
+        self._count = 0
+
+    def _fill(self, k: int):
+        '''Reads tokens into the ring buffer until it holds @param k tokens,
+        the end of the input is padded with EOF_TOKEN.'''
+        while self._count < k:
+            self._ring[(self._head + self._count) & self._mask] = next(self._source, EOF_TOKEN)
+            self._count += 1
+
+    def peek(self, k: int = 1) -> Token:
+        '''Returns the k-th upcoming token without consuming it.'''
+        if not 0 < k <= len(self._ring):
+            raise ValueError(f'lookahead of {k} exceeds the cursor ring size {len(self._ring)}')
+        if self._count < k:
+            self._fill(k)
+        return self._ring[(self._head + k - 1) & self._mask]
+
+    def next(self) -> Token:
+        '''Consumes and returns the upcoming token, EOF_TOKEN once the input
+        is exhausted.'''
+        if self._count:
+            tok = self._ring[self._head]
+            self._head = (self._head + 1) & self._mask
+            self._count -= 1
+            return tok
+        return next(self._source, EOF_TOKEN)
+
+
+def _filter(token_input: TokenBuffer | Iterable[Token], skip: frozenset) -> Iterator[Token]:
+    '''Yields the tokens which are not of a @param skip type, buffers are
+    checked on their type column, so skipped tokens are never materialized.'''
+    if isinstance(token_input, TokenBuffer):
+        types = token_input.types
+        return (token_input[i] for i in range(len(types)) if types[i] not in skip)
+    if not skip:
+        return iter(token_input)
+    return (tok for tok in token_input if tok.id not in skip)
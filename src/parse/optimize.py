@@ -0,0 +1,235 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the AST optimization pass, which runs between the parser and
+the back-ends (\sa serialize.py, codegen/llvm_ir.py):
+    constant folding => binary operators with two number operands are
+                        evaluated at compile time, with the i64 semantics of
+                        the generated code (wrap around, division truncates
+                        towards zero), divisions by zero stay as they are
+    hash-consing     => identical leaves (VarExprAST/NumExprAST with the same
+                        value) become a single shared node
+Note: The pass rewrites the AST in place and shared leaves must not be
+      mutated afterwards, both hold for everything after the parser.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from typing import Iterable, Iterator, List, NamedTuple
+from parse.ast import VarExprAST, NumExprAST, BinExprAST, CallExprAST, DeclExprAST, FuncExprAST
+import sys
+
+_I64_MOD = 1 << 64
+_I64_MIN = -(1 << 63)
+
+
+def wrap_i64(value: int) -> int:
+    '''Returns @param value wrapped into the i64 range (two's complement).'''
+    value &= _I64_MOD - 1
+    return value - _I64_MOD if value >> 63 else value
+
+
+def i64_value(literal: str) -> int:
+    '''Returns the value of the number literal @param literal as i64. Long
+    literals are reduced in chunks, so int()'s digit limit never applies.'''
+    negative = literal.startswith('-')
+    digits = literal[1:] if negative else literal
+    if len(digits) <= 18:
+        value = int(digits)
+    else:
+        value = 0
+        for start in range(0, len(digits), 18):
+            chunk = digits[start:start + 18]
+            value = (value * 10 ** len(chunk) + int(chunk)) % _I64_MOD
+    return wrap_i64(-value if negative else value)
+
+
+def _sdiv(lhs: int, rhs: int) -> int | None:
+    if rhs == 0 or (lhs == _I64_MIN and rhs == -1):
+        return None  # undefined at run time, left to the generated code
+    quotient = abs(lhs) // abs(rhs)
+    return quotient if (lhs < 0) == (rhs < 0) else -quotient
+
+
+def _srem(lhs: int, rhs: int) -> int | None:
+    quotient = _sdiv(lhs, rhs)
+    return None if quotient is None else lhs - rhs * quotient
+
+
+# Operator => i64 evaluation (None => can't be folded), \sa parser.py@BINARY_OPERATORS
+FOLDERS = {
+    '+': lambda lhs, rhs: wrap_i64(lhs + rhs),
+    '-': lambda lhs, rhs: wrap_i64(lhs - rhs),
+    '*': lambda lhs, rhs: wrap_i64(lhs * rhs),
+    '/': _sdiv,
+    '%': _srem,
+    '<': lambda lhs, rhs: int(lhs < rhs),
+    '>': lambda lhs, rhs: int(lhs > rhs),
+}
+
+
+def _footprint(node) -> int:
+    '''Bytes held by @param node itself (its value string for numbers, names
+    are interned by the symbol table anyway), children aren't included.'''
+    size = sys.getsizeof(node)
+    typ = type(node)
+    if typ is NumExprAST:
+        size += sys.getsizeof(node.value)
+    elif typ is CallExprAST or typ is DeclExprAST:
+        size += sys.getsizeof(node.args)
+    return size
+
+
+class OptimizationStats(NamedTuple):
+    '''Outcome of the pass, \sa Optimizer.stats.
+    @member nodes_before/after nodes (and lists) before & after the pass
+    @member bytes_before/after their memory, \sa _footprint
+    @member folded             binary operators evaluated at compile time
+    @member shared             leaves replaced by an identical shared one'''
+    nodes_before: int
+    nodes_after: int
+    bytes_before: int
+    bytes_after: int
+    folded: int
+    shared: int
+
+    @property
+    def nodes_saved(self) -> int:
+        return self.nodes_before - self.nodes_after
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+class Optimizer:
+    '''Runs the pass over top-level expressions (\sa Parser.parse), one at a
+    time, so it works on streamed ASTs too (\sa iter_optimize). The shared
+    leaves are kept in @member leaves across expressions.
+    @member leaves (type, value) => shared leaf'''
+    def __init__(self, fold: bool = True, share: bool = True):
+        self.fold = fold
+        self.share = share
+        self.leaves = {}
+        self.folded = 0
+        self.shared = 0
+        self.nodes_before = self.bytes_before = 0
+        self.nodes_after = self.bytes_after = 0
+
+    def stats(self) -> OptimizationStats:
+        return OptimizationStats(self.nodes_before, self.nodes_after, self.bytes_before,
+                                 self.bytes_after, self.folded, self.shared)
+
+    def optimize_all(self, expressions: List) -> List:
+        '''Optimizes every top-level expression of @param expressions.'''
+        expressions[:] = [self.optimize(expr) for expr in expressions]
+        return expressions
+
+    def iter_optimize(self, expressions: Iterable) -> Iterator:
+        '''Yields the optimized @param expressions as they come in.'''
+        for expr in expressions:
+            yield self.optimize(expr)
+
+    def _leaf(self, leaf):
+        '''Returns the shared node equal to @param leaf (which becomes the
+        shared one if there is none yet).'''
+        if not self.share:
+            self.nodes_after += 1
+            self.bytes_after += _footprint(leaf)
+            return leaf
+        key = (type(leaf), leaf.value)
+        shared = self.leaves.get(key)
+        if shared is None:
+            self.leaves[key] = leaf
+            self.nodes_after += 1
+            self.bytes_after += _footprint(leaf)
+            return leaf
+        if shared is not leaf:
+            self.shared += 1
+        return shared
+
+    def _slot(self, value):
+        '''Final value of a child slot, leaves are hash-consed only once they
+        are known to stay (folded operands never make it into the table).'''
+        typ = type(value)
+        if typ is VarExprAST or typ is NumExprAST:
+            return self._leaf(value)
+        return value
+
+    def optimize(self, root):
+        '''Returns the optimized top-level expression @param root (a node or
+        a list of them), rewritten in place in post-order with an explicit
+        stack, so arbitrarily deep trees don't hit the recursion limit.'''
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, ready = stack.pop()
+            typ = type(node)
+
+            if not ready:
+                self.nodes_before += 1
+                self.bytes_before += _footprint(node)
+                if typ is VarExprAST or typ is NumExprAST:
+                    results.append(node)  # hash-consed by its parent, \sa _slot
+                    continue
+                stack.append((node, True))
+                if typ is list:
+                    stack.extend((item, False) for item in reversed(node))
+                elif typ is BinExprAST:
+                    stack.append((node.rhs, False))
+                    stack.append((node.lhs, False))
+                elif typ is CallExprAST or typ is DeclExprAST:
+                    stack.extend((arg, False) for arg in reversed(node.args))
+                elif typ is FuncExprAST and node.declaration is not None:
+                    stack.append((node.declaration, False))
+                continue
+
+            if typ is BinExprAST:
+                rhs = results.pop()
+                lhs = results.pop()
+                folded = self._fold(node.operator, lhs, rhs)
+                if folded is not None:
+                    results.append(folded)
+                    continue
+                node.lhs, node.rhs = self._slot(lhs), self._slot(rhs)
+            elif typ is list:
+                self._collect(node, results)
+            elif typ is CallExprAST or typ is DeclExprAST:
+                self._collect(node.args, results)
+            elif typ is FuncExprAST and node.declaration is not None:
+                node.declaration = results.pop()
+            self.nodes_after += 1
+            self.bytes_after += _footprint(node)
+            results.append(node)
+
+        return self._slot(results.pop())
+
+    def _collect(self, items: list, results: list):
+        '''Moves the optimized @param items from the top of @param results
+        back into (the list) @param items.'''
+        start = len(results) - len(items)
+        items[:] = [self._slot(item) for item in results[start:]]
+        del results[start:]
+
+    def _fold(self, operator: str, lhs, rhs) -> NumExprAST | None:
+        if not self.fold or type(lhs) is not NumExprAST or type(rhs) is not NumExprAST:
+            return None
+        evaluate = FOLDERS.get(operator)
+        if evaluate is None:
+            return None
+        value = evaluate(i64_value(lhs.value), i64_value(rhs.value))
+        if value is None:
+            return None
+        self.folded += 1
+        return NumExprAST(str(value))
+
+
+def optimize(expressions: List, fold: bool = True, share: bool = True) -> OptimizationStats:
+    '''Optimizes the parsed @param expressions in place, \sa Optimizer.'''
+    optimizer = Optimizer(fold, share)
+    optimizer.optimize_all(expressions)
+    return optimizer.stats()
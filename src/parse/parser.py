@@ -10,107 +10,206 @@ __version__ = '.'
 # ===================================
 # Imports
 # ===================================
-from os import remove
-from typing import List
-from parse.ast import DeclExprAST, NumExprAST, ExprAST
-from tokenization.Tokens import TokenType, Token
-from tokenization.Tokens import remove_tokens
+from typing import Iterable, Iterator, List
+from parse.ast import DeclExprAST, NumExprAST, VarExprAST, CallExprAST, BinExprAST, ExprAST
+from parse.cursor import TokenCursor
+from tokenization.Tokens import TokenType, Token, TokenBuffer
+from tokenization.Symbols import SymbolTable
 from utils import ColorFormat as Coloring
 from utils import colored_out as asxout
 from utils import ClassUtils, LogOutput
 
 
+# Binary operator table (token type => (precedence, right associative)),
+# the higher the precedence the tighter the operator binds.
+BINARY_OPERATORS = {
+    TokenType.ASSIGN:  (1, True),
+    TokenType.LCHEV:   (10, False),
+    TokenType.RCHEV:   (10, False),
+    TokenType.PLUS:    (20, False),
+    TokenType.MINUS:   (20, False),
+    TokenType.STAR:    (40, False),
+    TokenType.SLASH:   (40, False),
+    TokenType.PERCENT: (40, False),
+}
+
+# Expression engine frame kinds, \sa Parser._parse_operands
+_ROOT, _LIST, _GROUP, _CALL = range(4)
+
+
+class _Frame:
+    '''A single nesting level of the expression engine: the finished
+    (comma separated) items, the operand & the pending operator stack.'''
+    __slots__ = ('kind', 'caller', 'items', 'operands', 'operators')
+
+    def __init__(self, kind: int, caller: str = None):
+        self.kind = kind
+        self.caller = caller
+        self.items = []
+        self.operands = []
+        self.operators = []
+
+    def reduce(self):
+        '''Applies the topmost pending operator to the two topmost operands.'''
+        _, operator = self.operators.pop()
+        rhs = self.operands.pop()
+        lhs = self.operands.pop()
+        self.operands.append(BinExprAST(operator, lhs, rhs))
+
+    def reduce_all(self) -> ExprAST:
+        while self.operators:
+            self.reduce()
+        return self.operands.pop()
+
+
+class Declaration(ClassUtils):
+    '''Declaration index entry, \sa Parser.declarations.
+    @member name   interned function name
+    @member symbol @member name's id in the parser's SymbolTable
+    @member arity  number of declared arguments
+    @member line   0-based line of the declaration ('!')
+    @member col    0-based column of the declaration ('!')
+    @member node   the declaration itself'''
+    __slots__ = ('name', 'symbol', 'arity', 'line', 'col', 'node')
+
+    def __init__(self, name: str, symbol: int, arity: int, line: int, col: int,
+                 node: DeclExprAST):
+        self.name = name
+        self.symbol = symbol
+        self.arity = arity
+        self.line = line
+        self.col = col
+        self.node = node
+
+
+class DeclarationIndex(ClassUtils):
+    '''Declaration index of an AST that isn't parsed again (e.g. a cached
+    one, \sa cache.py), resolves calls just like @method Parser.resolve.
+    @member symbols      the names of the declarations
+    @member declarations symbol id => Declaration, \sa Parser.declarations'''
+    __slots__ = ('symbols', 'declarations')
+
+    def __init__(self, declarations: Iterable[Declaration] = (), symbols: SymbolTable = None):
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.declarations = {}
+        for decl in declarations:
+            decl.symbol = self.symbols.intern(decl.name)
+            self.declarations[decl.symbol] = decl
+
+    def resolve(self, call: CallExprAST) -> Declaration | None:
+        '''Returns the declaration @param call refers to, \sa Parser.resolve.'''
+        symbol = self.symbols.lookup(call.caller)
+        if symbol is None:
+            return None
+        return self.declarations.get(symbol)
+
+
 class Parser(ClassUtils):
     '''Parser associated with AAST, parses tokens and matches
     them into Expressions (\sa ast.py@ExprAST) and handles reading tokens.'''
-    def __init__(self, token_input: List[List[Token]], remove_spaces=True, log_levels=[]):
+    def __init__(self, token_input: TokenBuffer | Iterable[Token], remove_spaces=True, log_levels=[],
+                 log_sink=None, symbols: SymbolTable = None):
         '''Parameters:
-        @token_input Tokens getting parsed into the AST.
-        @log_levels  List of output priority levels, \sa utils.py@LogOutput.'''
+        @token_input Tokens getting parsed into the AST, either a whole
+                     TokenBuffer or a token stream (\sa Tokenizer.stream)
+                     which is only pulled from on demand.
+        @log_levels  List of output priority levels, \sa utils.py@LogOutput.
+        @log_sink    Where log output goes to, \sa utils.py@StreamSink.
+        @symbols     Identifier table names get interned into, defaults to
+                     the table of an interned TokenBuffer or a new one.'''
         # NOTE Consider always removing the spaces, therefore also removing
         #      the parameter @param remove_spaces 
         self.token_input = token_input
-        if remove_spaces:
-            self.token_input = [remove_tokens(line, 0) for line in token_input]
+        skip = (TokenType.SPACE,) if remove_spaces else ()
 
         # Token Handling Attributes
+        self._cursor = TokenCursor(token_input, skip=skip)
         self.cur_tok = Token()
-        self._line_index = 0
-        self._token_index = 0
+        self._last_tok = self.cur_tok
+
+        # Symbol Handling Attributes, every name in the AST is interned and
+        # each declaration is indexed by its symbol id (\sa resolve)
+        if symbols is None:
+            symbols = getattr(token_input, 'symbols', None) or SymbolTable()
+        self.symbols = symbols
+        self.declarations = {}
+        self._canonical = symbols.canonical
 
-        # Logging System Setup ([vvv] Optionally Mutable Attribute) 
+        # Logging System Setup, the level checks are hoisted out of the
+        # token loop (levels are fixed once the parser is constructed)
         self.log_importance_levels = log_levels
-        self._log_out = LogOutput(self.log_importance_levels)
+        self._log_out = LogOutput(self.log_importance_levels, log_sink)
+        self._trace = self._log_out.enabled(2)
+        self._debug = self._log_out.enabled(3)
 
         # Map that stores the function calls for the associated token
         # \sa self.cur_tok
         self.AST_CALL_MAP = {
-              TokenType.NUMBER: self.parse_num_expr,
-              TokenType.LPAREN: self.parse_paren_expr,
+              TokenType.NUMBER: self.parse_bin_expr,
+              TokenType.NAME  : self.parse_bin_expr,
+              TokenType.LPAREN: self.parse_bin_expr,
               TokenType.EXCL  : self.parse_decl_expr,
         }
 
-    def parse(self):
-        '''Parses the given token_input'''
-        self.cur_tok = self.get_next_token()
+    def parse(self) -> List[ExprAST]:
+        '''Parses the given token_input & returns the top-level expressions.'''
+        return list(self.iter_parse())
 
-        if self.cur_tok.id != TokenType.EOF:
-            self.parse_expr()
+    def iter_parse(self) -> Iterator[ExprAST | List]:
+        '''Yields the top-level expressions one by one as they are parsed,
+        together with a token stream (\sa Tokenizer.stream) neither the tokens
+        nor the AST are ever held as a whole (\sa codegen/llvm_ir.py).'''
+        self.get_next_token()
+
+        while self.cur_tok.id != TokenType.EOF:
+            expr = self.parse_expr()
+            if expr is None:
+                self.get_next_token() # skip the (already reported) token
+            else:
+                yield expr
+
+    def resolve(self, call: CallExprAST) -> Declaration | None:
+        '''Returns the declaration @param call refers to in O(1),
+        None if there is no such declaration (yet).'''
+        symbol = self.symbols.lookup(call.caller)
+        if symbol is None:
+            return None
+        return self.declarations.get(symbol)
 
     def get_next_token(self) -> Token:
-        """Static variable behaviour, upon call => moves to the next token.
-        Note: Manages self._line_index & self._token_index."""
-        # Line end    = reset token index, add 1 to line index
-        # First token = return first token & don't subtract -1 from self._token_index
-        if self._line_index >= len(self.token_input):
-            self.cur_tok = Token(TokenType.EOF)
-            return Token(TokenType.EOF)
-
-        # Token Index Management => (Reset token index upon max. line len reached)
-        #                        => (Add 1 to line index)
-        if self._token_index == len(self.token_input[self._line_index]):
-            self._line_index += 1
-            self._token_index = 0
-        self._token_index += 1
-
-        # Check for special token indexes
-        if self._line_index >= len(self.token_input):
-            self.cur_tok = Token(TokenType.EOF)
-            return Token(TokenType.EOF)
-        elif self._line_index == 0 and self._token_index == 0:
-            self._token_index += 1
-            return self.token_input[0][0]
-
-        self.cur_tok = self.token_input[self._line_index][self._token_index-1]
-        self._log_out.src_log(2, 'Parser', f'{self._get_ctx()}, {self.cur_tok}')
+        """Static variable behaviour, upon call => moves to the next token."""
+        self._last_tok = self.cur_tok
+        self.cur_tok = self._cursor.next()
+        if self._trace and self.cur_tok.id != TokenType.EOF:
+            self._log_out.src_log(2, 'Parser', '{}, {}', self._get_ctx(), self.cur_tok)
 
         return self.cur_tok
 
+    def peek(self, k: int = 1) -> Token:
+        """Returns the k-th token after self.cur_tok without consuming it."""
+        return self._cursor.peek(k)
+
     def _get_ctx(self) -> str:
         '''Returns the context, context as in:
-        The current token index, in the given current line index.
-        Format: @L[lineindex], @T[tokenindex]'''
-        ctx_str = f'@L[{self._line_index+1}], @T[{self._token_index}]'
-        return ctx_str
+        The line & column of the current token, the last real token
+        is used once the end of the input has been reached.
+        Format: @L[line], @C[column]'''
+        tok = self.cur_tok
+        if tok.id == TokenType.EOF:
+            tok = self._last_tok
+        return f'@L[{tok.line+1}], @C[{tok.col+1}]'
 
     def _get_last_ctx(self) -> str:
-        '''Returns the token context before the current token (self.cur_tok),
-        returns the current token context if the last token (-1) 
-        would be a negative line index.'''
-        line = self._line_index
-        token = self._token_index - 1
-
-        if token == 0 and line != 0:
-            line -= 1
-            token = len(self.token_input[line])
-        
-        return f'@L[{line+1}], @T[{token}]'
+        '''Returns the context of the token before the current token (self.cur_tok).'''
+        tok = self._last_tok
+        return f'@L[{tok.line+1}], @C[{tok.col+1}]'
 
     # ::= AnyExpr
     def parse_expr(self) -> ExprAST | None:
         '''General parse expression function, parses all kinds of expressions,
         if there is no associated expr parse function => returns None.'''
-        self._log_out.src_log(3, 'Parser', 'self.parse_expr() called.')
+        if self._debug:
+            self._log_out.src_log(3, 'Parser', 'self.parse_expr() called.')
         parse_call = self.AST_CALL_MAP.get(self.cur_tok.id)
         if parse_call == None:
             asxout(
@@ -122,55 +221,151 @@ class Parser(ClassUtils):
         
         return parse_call() # => Expression
 
-    # => 1  || [0-9] || int || TODO -> Implement float
-    def parse_num_expr(self) -> NumExprAST:
-        '''Parses every needed token for expression.'''
-        expr = NumExprAST(self.cur_tok.value)
-        self.get_next_token() # eat number literal
-        
-        return expr
+    # ::= primary (binop primary)*
+    #   primary ::= number | name | name '(' expr, ... ')' | '(' expr, ... ')'
+    def parse_bin_expr(self) -> ExprAST | List | None:
+        '''Parses a whole (binary operator) expression, \sa _parse_operands.'''
+        if self._debug:
+            self._log_out.src_log(3, 'Parser', 'self.parse_bin_expr() called.')
+        return self._parse_operands(_ROOT)
 
     # ::= '(' expr, ... ')'
     def parse_paren_expr(self) -> List[ExprAST] | List:
         '''Parses expr(s) in between of parenthesis.'''
-        self._log_out.src_log(3, 'Parser', 'self.parse_paren_expr() called.')
-        expressions = []
-        
+        if self._debug:
+            self._log_out.src_log(3, 'Parser', 'self.parse_paren_expr() called.')
         self.get_next_token() # eat '('
-        if self.cur_tok.id != TokenType.RPAREN:
-            # Parse every in-paren expression, until RPAREN ends it
-            while True:
-                cur_expr = self.parse_expr()
-                if cur_expr != None:
-                    expressions.append(cur_expr)
-                
-                if self.cur_tok.id == TokenType.RPAREN:
-                    break
-                elif self.cur_tok.id != TokenType.COMMA:
-                    if self.cur_tok.id != TokenType.SPACE:
-                        asxout(
-                            Coloring.src_error,
-                            'ParseParenExpr', 
-                            f'Expected [\')\'] or [\',\']; {self._get_last_ctx()}'
-                        )
-
-                self.get_next_token()
-        else:
-            return expressions # empty in this case
-        self.get_next_token()
+        return self._parse_operands(_LIST)
+
+    def _parse_operands(self, root_kind: int) -> ExprAST | List | None:
+        '''Iterative precedence climbing (shunting-yard) expression engine.
+        Nested parenthesis & call argument lists get a frame on an explicit
+        stack instead of a recursive call, so nesting depth is only bound by
+        memory and every token is handled once (linear time).
+        @param root_kind _ROOT => returns a single expression (None if there is
+                                  no expression at the current token),
+                         _LIST => cur_tok is past a '(', returns the list of
+                                  expressions up to the matching ')'.'''
+        frame = _Frame(root_kind)
+        frames = [frame]
+        expect_operand = True
+
+        while True:
+            tok = self.cur_tok
+            typ = tok.id
+
+            if expect_operand:
+                if typ == TokenType.NUMBER:
+                    frame.operands.append(NumExprAST(tok.value))
+                    self.get_next_token() # eat number literal
+                    expect_operand = False
+                    continue
+
+                if typ == TokenType.NAME:
+                    upcoming = self.peek()
+                    if upcoming.id == TokenType.LPAREN and upcoming.line == tok.line:
+                        self.get_next_token() # eat name
+                        self.get_next_token() # eat '('
+                        frame = _Frame(_CALL, self._canonical(tok.value))
+                        frames.append(frame)
+                        continue
+                    frame.operands.append(VarExprAST(self._canonical(tok.value)))
+                    self.get_next_token() # eat name
+                    expect_operand = False
+                    continue
+
+                if typ == TokenType.LPAREN:
+                    self.get_next_token() # eat '('
+                    frame = _Frame(_GROUP)
+                    frames.append(frame)
+                    continue
+
+                # '()' => empty list, '(a, )' => trailing comma
+                if typ == TokenType.RPAREN and frame.kind != _ROOT and not frame.operators:
+                    expect_operand = False
+                    continue
+
+                # Otherwise there is no expression here, an operator can
+                # never be pushed without an operand (fatal errors exit)
+                asxout(
+                    Coloring.src_warning,
+                    'ParseExpr',
+                    f'{tok} {self._get_ctx()} has no associated parse expr function.'
+                )
+                if frame.operators:
+                    asxout(
+                        Coloring.src_error,
+                        'ParseBinExpr', f'Expected expression after operator; {self._get_last_ctx()}'
+                    )
+                if frame.kind == _ROOT:
+                    return None
+                if typ != TokenType.COMMA:
+                    asxout(
+                        Coloring.src_error,
+                        'ParseParenExpr',
+                        f'Expected [\')\'] or [\',\']; {self._get_last_ctx()}'
+                    )
+                expect_operand = False
+                continue
 
-        return expressions # not empty in this case
+            operator = BINARY_OPERATORS.get(typ)
+            if operator is not None:
+                precedence, right_assoc = operator
+                operators = frame.operators
+                while operators and (operators[-1][0] > precedence or
+                                     operators[-1][0] == precedence and not right_assoc):
+                    frame.reduce()
+                operators.append((precedence, tok.value))
+                self.get_next_token() # eat operator
+                expect_operand = True
+                continue
+
+            if frame.kind == _ROOT:
+                return frame.reduce_all()
+
+            if typ == TokenType.COMMA:
+                if frame.operands:
+                    frame.items.append(frame.reduce_all())
+                self.get_next_token() # eat ','
+                expect_operand = True
+                continue
+
+            if typ != TokenType.RPAREN:
+                asxout(
+                    Coloring.src_error,
+                    'ParseParenExpr', 
+                    f'Expected [\')\'] or [\',\']; {self._get_last_ctx()}'
+                )
+
+            if frame.operands:
+                frame.items.append(frame.reduce_all())
+            self.get_next_token() # eat ')'
+
+            frames.pop()
+            if frame.kind == _LIST:
+                return frame.items
+            elif frame.kind == _CALL:
+                value = CallExprAST(frame.caller, frame.items)
+            else:
+                # '(expr)' groups, '(expr, ...)' stays a list of expressions
+                value = frame.items[0] if len(frame.items) == 1 else frame.items
+
+            frame = frames[-1]
+            frame.operands.append(value)
+            expect_operand = False
 
     def parse_decl_expr(self) -> DeclExprAST:
         '''Parses the function declaration expression.
         Called when token is TokenType.DEF'''
-        self._log_out.src_log(3, 'Parser', 'self.parse_declr_expr() called.')
+        if self._debug:
+            self._log_out.src_log(3, 'Parser', 'self.parse_declr_expr() called.')
         # Expression = def function_name(args):
         func_name = None
         func_args = None
 
+        decl_tok = self.cur_tok
         self.get_next_token() # eat '!'
-        func_name = self.cur_tok.value
+        func_name = self._canonical(self.cur_tok.value)
 
         self.get_next_token() # should be '(', if not => Error
         if self.cur_tok.id != TokenType.LPAREN:
@@ -179,13 +374,31 @@ class Parser(ClassUtils):
                 'ParseDeclExpr', f'Expected [\'(\']; {self._get_ctx()}'
             )
         
-        # Calls @method self.parse_paren_expr()
-        func_args = self.parse_expr()
+        func_args = self.parse_paren_expr()
 
         if self.cur_tok.id != TokenType.COLON:
             asxout(
                 Coloring.src_error,
                 'ParseDeclrExpr', f'Expected [\':\']; {self._get_ctx()}'
             )
+        self.get_next_token() # eat ':'
+
+        decl = DeclExprAST(name=func_name, args=func_args)
+        self._declare(decl, decl_tok)
+        return decl
 
-        return DeclExprAST(name=func_name, args=func_args)
+    def _declare(self, decl: DeclExprAST, decl_tok: Token):
+        '''Records @param decl in the declaration index, a redeclaration
+        replaces the earlier entry and is reported.'''
+        symbol = self.symbols.intern(decl.name)
+        previous = self.declarations.get(symbol)
+        if previous is not None:
+            asxout(
+                Coloring.src_warning,
+                'ParseDeclExpr',
+                f'Redeclaration of [\'{decl.name}\'] (first declared @L[{previous.line+1}], '
+                f'@C[{previous.col+1}]); @L[{decl_tok.line+1}], @C[{decl_tok.col+1}]'
+            )
+        self.declarations[symbol] = Declaration(
+            decl.name, symbol, len(decl.args), decl_tok.line, decl_tok.col, decl
+        )
@@ -0,0 +1,392 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the binary AST format, used to hand parsed ASTs to other
+processes (e.g. the code generator), and its memory-mapped lazy reader.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from typing import Iterator, List
+from parse.ast import (
+    VarExprAST, NumExprAST, BinExprAST, CallExprAST, DeclExprAST, FuncExprAST
+)
+from operator import attrgetter
+from array import array
+import struct
+import mmap
+import sys
+
+# Binary AST layout (little endian, everything is a u32 word apart from
+# the header & the string blob):
+#   header  => magic, version, flags, node count, root count,
+#              node words, string count, string blob size
+#   nodes   => records: header word (kind | body word count << 8), body,
+#              where the body is a word per field (string id / node offset,
+#              NONE for None) and, for list fields, a count word followed by
+#              the node offsets
+#   roots   => node offset [root count]
+#   strings => blob offset [string count + 1], utf-8 blob
+# Node offsets are word indices into the nodes section, children are always
+# written before their parents and shared subtrees are written once.
+AST_MAGIC = b'ASXA'
+AST_VERSION = 1
+_HEADER = struct.Struct('<4sHHIIQIQ')
+
+NONE = 0xFFFFFFFF
+_MAX_BODY = (1 << 24) - 1
+
+# Record kinds, field layout per kind: 's' => string, 'n' => node,
+# 'l' => list of nodes (always the last field)
+KIND_LIST = 0
+NODE_LAYOUTS = {
+    VarExprAST:  (1, (('value', 's'),)),
+    NumExprAST:  (2, (('value', 's'),)),
+    BinExprAST:  (3, (('operator', 's'), ('lhs', 'n'), ('rhs', 'n'))),
+    CallExprAST: (4, (('caller', 's'), ('args', 'l'))),
+    DeclExprAST: (5, (('name', 's'), ('args', 'l'))),
+    FuncExprAST: (6, (('declaration', 'n'), ('content', 's'))),
+}
+KIND_CLASSES = {kind: cls for cls, (kind, _) in NODE_LAYOUTS.items()}
+
+
+def _le(words: array) -> bytes:
+    if sys.byteorder == 'big':
+        words = array('I', words)
+        words.byteswap()
+    return words.tobytes()
+
+
+class _Encoder:
+    '''Builds the sections of a binary AST, \sa dump_ast.'''
+    def __init__(self):
+        self.words = array('I')
+        self.offsets = {}   # id(node or list) => node offset
+        self.strings = {}   # str => id
+        self.count = 0
+        # class => (kind, field getter, field types), fields as tuple
+        self.layouts = {
+            cls: (kind, attrgetter(*(field for field, _ in fields)), ''.join(typ for _, typ in fields))
+            for cls, (kind, fields) in NODE_LAYOUTS.items()
+        }
+
+    def string(self, value) -> int:
+        if value is None:
+            return NONE
+        id_ = self.strings.get(value)
+        if id_ is None:
+            if not isinstance(value, str):
+                raise TypeError(f'cannot serialize {value!r} as string field')
+            id_ = self.strings[value] = len(self.strings)
+        return id_
+
+    def ref(self, value) -> int:
+        return NONE if value is None else self.offsets[id(value)]
+
+    def fields(self, value) -> tuple:
+        '''Returns (kind, field values, field types) of the node @param value.'''
+        layout = self.layouts.get(type(value))
+        if layout is None:
+            raise TypeError(f'cannot serialize {type(value).__name__}')
+        kind, getter, types = layout
+        values = getter(value)
+        return kind, (values,) if len(types) == 1 else values, types
+
+    def children(self, value) -> list:
+        if isinstance(value, list):
+            return value
+        _, values, types = self.fields(value)
+        children = []
+        for field_value, typ in zip(values, types):
+            if field_value is None or typ == 's':
+                continue
+            if typ == 'n':
+                children.append(field_value)
+            else:
+                children.extend(field_value)
+        return children
+
+    def encode(self, value):
+        '''Appends the record of @param value, its children are written already.'''
+        ref = self.ref
+        if isinstance(value, list):
+            kind, body = KIND_LIST, [len(value)] + [ref(item) for item in value]
+        else:
+            kind, values, types = self.fields(value)
+            body = []
+            for field_value, typ in zip(values, types):
+                if typ == 's':
+                    body.append(self.string(field_value))
+                elif typ == 'n':
+                    body.append(ref(field_value))
+                elif field_value is None:
+                    body.append(NONE)
+                else:
+                    body.append(len(field_value))
+                    body.extend(ref(item) for item in field_value)
+
+        words = self.words
+        if len(words) >= NONE or len(body) > _MAX_BODY:
+            raise ValueError('AST too large for the binary format')
+        self.offsets[id(value)] = len(words)
+        words.append(kind | len(body) << 8)
+        words.extend(body)
+        self.count += 1
+
+    def add(self, root):
+        '''Writes @param root & everything below it (post-order, iteratively
+        so arbitrarily deep trees don't hit the recursion limit).'''
+        offsets = self.offsets
+        stack = [(root, False)]
+        while stack:
+            value, expanded = stack.pop()
+            if id(value) in offsets:
+                continue
+            if expanded:
+                self.encode(value)
+                continue
+            stack.append((value, True))
+            stack.extend((child, False) for child in reversed(self.children(value))
+                         if id(child) not in offsets)
+
+
+def dump_ast(nodes: List) -> bytes:
+    '''Returns the binary AST of the top-level expressions @param nodes
+    (\sa Parser.parse), \sa AstReader.'''
+    encoder = _Encoder()
+    for node in nodes:
+        encoder.add(node)
+
+    strings = [value.encode() for value in encoder.strings]
+    string_offsets = array('I', [0])
+    for value in strings:
+        string_offsets.append(string_offsets[-1] + len(value))
+    blob = b''.join(strings)
+
+    return b''.join((
+        _HEADER.pack(AST_MAGIC, AST_VERSION, 0, encoder.count, len(nodes),
+                     len(encoder.words), len(strings), len(blob)),
+        _le(encoder.words),
+        _le(array('I', [encoder.ref(node) for node in nodes])),
+        _le(string_offsets),
+        blob,
+    ))
+
+
+def write_ast(nodes: List, path: str):
+    '''Writes the binary AST of @param nodes to @param path.'''
+    with open(path, 'wb') as f:
+        f.write(dump_ast(nodes))
+
+
+class NodeView:
+    '''Lazy view of a single serialized node, fields are decoded on access
+    only (\sa NODE_LAYOUTS for the field names, which match the AST node
+    classes). List fields are returned as @class ListView.'''
+    __slots__ = ('reader', 'offset', 'kind')
+
+    def __init__(self, reader: 'AstReader', offset: int, kind: int):
+        self.reader = reader
+        self.offset = offset
+        self.kind = kind
+
+    @property
+    def type_name(self) -> str:
+        return KIND_CLASSES[self.kind].__name__
+
+    def __getattr__(self, name: str):
+        layout = _FIELD_INDEX[self.kind].get(name)
+        if layout is None:
+            raise AttributeError(f'{self.type_name} has no field {name!r}')
+        index, typ = layout
+        reader = self.reader
+        value = reader.words[self.offset + 1 + index]
+        if value == NONE:
+            return None
+        if typ == 's':
+            return reader.string(value)
+        if typ == 'n':
+            return reader.node(value)
+        return ListView(reader, self.offset + 1 + index)
+
+    def __repr__(self):
+        return f'<{self.type_name} view @{self.offset}>'
+
+
+class ListView:
+    '''Lazy sequence of the nodes of a serialized list.'''
+    __slots__ = ('reader', 'start', 'length')
+    type_name = 'list'
+
+    def __init__(self, reader: 'AstReader', count_offset: int):
+        self.reader = reader
+        self.start = count_offset + 1
+        self.length = reader.words[count_offset]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('list view index out of range')
+        ref = self.reader.words[self.start + index]
+        return None if ref == NONE else self.reader.node(ref)
+
+    def __iter__(self):
+        for index in range(self.length):
+            yield self[index]
+
+    def __repr__(self):
+        return f'<list view of {self.length} nodes>'
+
+
+# kind => {field => (index, type)}, \sa NodeView.__getattr__
+_FIELD_INDEX = {
+    kind: {field: (index, typ) for index, (field, typ) in enumerate(layout)}
+    for kind, layout in NODE_LAYOUTS.values()
+}
+
+
+class AstReader:
+    '''Reads a binary AST (\sa dump_ast) without deserializing it: nodes are
+    only decoded once they are accessed (\sa roots, NodeView), strings are
+    decoded once & cached. Usage:
+        with AstReader.open('main.asta') as ast:
+            for node in ast.roots:
+                if node.type_name == 'DeclExprAST':
+                    print(node.name, len(node.args))'''
+    def __init__(self, data):
+        '''@param data the format's bytes (bytes, memoryview or mmap), on
+        little endian machines the words are used in place (no copy).'''
+        if len(data) < _HEADER.size:
+            raise ValueError('not an Astro AST file')
+        (magic, version, self.flags, self.node_count, self.root_count,
+         node_words, self.string_count, blob_size) = _HEADER.unpack_from(data)
+        if magic != AST_MAGIC:
+            raise ValueError('not an Astro AST file')
+        if version != AST_VERSION:
+            raise ValueError(f'unsupported AST file version {version}')
+
+        word_count = node_words + self.root_count + self.string_count + 1
+        self.blob_start = _HEADER.size + 4 * word_count
+        if self.blob_start + blob_size > len(data):
+            raise ValueError('truncated Astro AST file')
+
+        self.data = data
+        self._view = memoryview(data)
+        words = self._view[_HEADER.size:self.blob_start]
+        if sys.byteorder == 'little':
+            words = words.cast('I')
+        else:
+            words = array('I', words.tobytes())
+            words.byteswap()
+
+        # Nodes, roots & string offsets are slices of the same words
+        self.words = words
+        self.roots_start = node_words
+        self.strings_start = node_words + self.root_count
+        self._strings = {}
+        self._mmap = None
+
+    @classmethod
+    def open(cls, path: str) -> 'AstReader':
+        '''Maps the file at @param path read-only, \sa close.'''
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        reader = cls(data)
+        reader._mmap = data
+        return reader
+
+    def close(self):
+        '''Unmaps the file, views taken from this reader become invalid.'''
+        if isinstance(self.words, memoryview):
+            self.words.release()
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> 'AstReader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def string(self, id_: int) -> str:
+        value = self._strings.get(id_)
+        if value is None:
+            start = self.blob_start + self.words[self.strings_start + id_]
+            end = self.blob_start + self.words[self.strings_start + id_ + 1]
+            value = self._strings[id_] = str(self._view[start:end], 'utf-8')
+        return value
+
+    def node(self, offset: int) -> NodeView | ListView:
+        '''Returns the view of the record at @param offset (lists => ListView).'''
+        kind = self.words[offset] & 0xFF
+        if kind == KIND_LIST:
+            return ListView(self, offset + 1)
+        return NodeView(self, offset, kind)
+
+    @property
+    def roots(self) -> List:
+        '''Views of the top-level expressions.'''
+        return [self.node(ref) for ref in self.words[self.roots_start:self.strings_start]]
+
+    def iter_records(self) -> Iterator[tuple]:
+        '''Yields (offset, kind) of every record, in file order, without
+        decoding any of them (records are length-prefixed).'''
+        words, pos, end = self.words, 0, self.roots_start
+        while pos < end:
+            header = words[pos]
+            yield pos, header & 0xFF
+            pos += 1 + (header >> 8)
+
+    def materialize(self) -> List:
+        '''Deserializes the whole file back into AST nodes (shared subtrees
+        stay shared). Records are decoded in file order, so children always
+        exist before their parents.'''
+        words, string = self.words, self.string
+        layouts = {kind: (KIND_CLASSES[kind], ''.join(typ for _, typ in fields))
+                   for kind, fields in NODE_LAYOUTS.values()}
+        values = {NONE: None}
+        pos, end = 0, self.roots_start
+        while pos < end:
+            header = words[pos]
+            kind = header & 0xFF
+            body = words[pos + 1:pos + 1 + (header >> 8)]
+            if kind == KIND_LIST:
+                values[pos] = [values[ref] for ref in body[1:]]
+            else:
+                cls, types = layouts[kind]
+                args = []
+                for index, typ in enumerate(types):
+                    value = body[index]
+                    if value == NONE:
+                        args.append(None)
+                    elif typ == 's':
+                        args.append(string(value))
+                    elif typ == 'n':
+                        args.append(values[value])
+                    else:
+                        args.append([values[ref] for ref in body[index + 1:index + 1 + value]])
+                values[pos] = cls(*args)
+            pos += 1 + (header >> 8)
+
+        return [values[ref] for ref in words[self.roots_start:self.strings_start]]
+
+
+def load_ast(data) -> List:
+    '''Deserializes a whole binary AST, \sa AstReader for lazy access.'''
+    return AstReader(data).materialize()
+
+
+def read_ast(path: str) -> List:
+    '''Deserializes the binary AST file at @param path.'''
+    with AstReader.open(path) as reader:
+        return reader.materialize()
@@ -0,0 +1,177 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the AST visitor framework. Analyses are written as passes
+(\sa Pass) and a @class PassManager runs any number of them fused into a
+single iterative walk of the tree, so every additional analysis only adds
+its handler calls, not another traversal.
+Usage:
+    stats, symbols = NodeStats(), SymbolCollector()   (\sa analysis.py)
+    PassManager([stats, symbols]).run(ast)'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from parse.ast import ExprAST, VarExprAST, NumExprAST, BinExprAST, CallExprAST, DeclExprAST, FuncExprAST
+from operator import attrgetter
+
+
+def _reversed_args(node) -> list:
+    return node.args[::-1]
+
+
+def _declaration(node) -> tuple:
+    return () if node.declaration is None else (node.declaration,)
+
+
+# Class => children in reverse (stack push) order, None => leaf, classes
+# missing here are resolved through their __slots__ once, \sa children_getter
+CHILDREN = {
+    VarExprAST:  None,
+    NumExprAST:  None,
+    BinExprAST:  attrgetter('rhs', 'lhs'),
+    CallExprAST: _reversed_args,
+    DeclExprAST: _reversed_args,
+    FuncExprAST: _declaration,
+    list:        lambda node: node[::-1],
+}
+
+
+def children_getter(cls: type) -> Callable | None:
+    '''Returns the children getter of @param cls (\sa CHILDREN), unknown
+    node classes get a generic one over their __slots__ (cached).'''
+    try:
+        return CHILDREN[cls]
+    except KeyError:
+        pass
+
+    fields = [field for klass in cls.__mro__ for field in getattr(klass, '__slots__', ())]
+
+    def generic(node) -> list:
+        found = []
+        for field in fields:
+            value = getattr(node, field, None)
+            if isinstance(value, (ExprAST, list)):
+                found.append(value)
+        return found[::-1]
+
+    getter = CHILDREN[cls] = generic if fields else None
+    return getter
+
+
+class Pass:
+    '''Base class of the passes run by @class PassManager. Handlers are
+    found by name, once per node class (\sa PassManager._dispatch):
+        visit_<Class>(node)  called before the node's children
+        leave_<Class>(node)  called after them
+    where <Class> is the node's class or the closest of its bases that has
+    a handler, e.g. visit_ExprAST sees every node, visit_list every list of
+    nodes (parenthesized expressions, arguments aren't visited as list).
+    @member name key of the pass' result, \sa PassManager.results'''
+    name: str = None
+
+    def begin(self):
+        '''Called before the first expression is walked.'''
+
+    def result(self) -> Any:
+        '''Returns the outcome of the pass once everything got walked.'''
+        return None
+
+
+class PassManager:
+    '''Runs the registered @member passes in a single (fused) walk. The
+    per-class dispatch tables (bound handlers of every pass) are built the
+    first time a class is encountered and then reused, passes are called in
+    registration order for every node.'''
+    def __init__(self, passes: Iterable[Pass] = ()):
+        self.passes = []
+        self._enter = {}    # class => (handler, ...)
+        self._leave = {}    # class => (handler, ...)
+        for pass_ in passes:
+            self.register(pass_)
+
+    def register(self, pass_: Pass) -> Pass:
+        '''Adds @param pass_, the dispatch tables get rebuilt.'''
+        self.passes.append(pass_)
+        self._enter.clear()
+        self._leave.clear()
+        return pass_
+
+    def _dispatch(self, cls: type) -> tuple:
+        '''Builds the (enter, leave) handler tuples of @param cls.'''
+        enter, leave = [], []
+        for pass_ in self.passes:
+            for prefix, handlers in (('visit_', enter), ('leave_', leave)):
+                for klass in cls.__mro__:
+                    handler = getattr(pass_, prefix + klass.__name__, None)
+                    if handler is not None:
+                        handlers.append(handler)
+                        break
+        self._enter[cls] = tuple(enter)
+        self._leave[cls] = tuple(leave)
+        return self._enter[cls], self._leave[cls]
+
+    def walk(self, root):
+        '''Walks @param root (a node or a list of them) in pre-order with an
+        explicit stack, so arbitrarily deep trees don't hit the recursion
+        limit. Leave handlers run once all children have been walked.'''
+        enter_table, leave_table = self._enter, self._leave
+        exit_marker = _EXIT
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node is exit_marker:
+                node = stack.pop()
+                for handler in leave_table[type(node)]:
+                    handler(node)
+                continue
+
+            cls = type(node)
+            enter = enter_table.get(cls)
+            if enter is None:
+                enter, _ = self._dispatch(cls)
+            for handler in enter:
+                handler(node)
+
+            if leave_table[cls]:
+                stack.append(node)
+                stack.append(exit_marker)
+            getter = CHILDREN.get(cls, _MISSING)
+            if getter is _MISSING:
+                getter = children_getter(cls)
+            if getter is not None:
+                stack.extend(getter(node))
+
+    def iter_walk(self, expressions: Iterable) -> Iterator:
+        '''Walks @param expressions one by one & yields them on, so the passes
+        can run inside a streamed pipeline (\sa Parser.iter_parse), call
+        @method begin first & @method results after.'''
+        for expr in expressions:
+            self.walk(expr)
+            yield expr
+
+    def begin(self):
+        for pass_ in self.passes:
+            pass_.begin()
+
+    def results(self) -> Dict[str, Any]:
+        '''Returns {pass name (or class name) => pass result}.'''
+        return {pass_.name or type(pass_).__name__: pass_.result() for pass_ in self.passes}
+
+    def run(self, expressions: List) -> Dict[str, Any]:
+        '''Runs all passes over the top-level @param expressions, \sa results.'''
+        self.begin()
+        walk = self.walk
+        for expr in expressions:
+            walk(expr)
+        return self.results()
+
+
+# Stack marker: the node below it gets its leave handlers called
+_EXIT = object()
+_MISSING = object()
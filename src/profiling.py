@@ -0,0 +1,178 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the per-phase compiler instrumentation (\sa __main__ --profile),
+wall time, peak memory & counters are exported as JSON or in the
+Prometheus text exposition format.
+Note: tracemalloc, cProfile & json are only imported once profiling is
+      actually used, importing this module stays cheap.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '.'
+# ===================================
+# Imports
+# ===================================
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List
+from parse.ast import iter_nodes
+import time
+
+PROFILE_FORMATS = ('json', 'prometheus')
+REPORT_VERSION = 1
+
+# Prometheus metric name prefix, \sa PhaseProfiler.to_prometheus
+METRIC_PREFIX = 'astro'
+
+
+class PhaseProfiler:
+    '''Collects the wall time & the peak (traced) memory of every compiler
+    phase plus arbitrary counters (tokens, lines, AST nodes, ...).
+    Usage:
+        profiler = PhaseProfiler()
+        with profiler.phase('tokenize'):
+            ...
+        profiler.count('tokens', len(tokens))
+        profiler.stop()
+    @member phases   phase name => {'seconds', 'peak_bytes'} (in run order)
+    @member counters counter name => value'''
+    def __init__(self, source: str = '', memory: bool = True, cprofile: bool = False):
+        '''@param source   compiled file(s), exported as label
+        @param memory   sample peak memory with tracemalloc (slows every
+                        phase down, timings get inflated accordingly)
+        @param cprofile capture a cProfile of all phases (\sa dump_cprofile)'''
+        import tracemalloc
+
+        self.source = source
+        self.memory = memory
+        self.phases = {}
+        self.counters = {}
+        self.profile = None
+        if cprofile:
+            import cProfile
+            self.profile = cProfile.Profile()
+        self._tracemalloc = tracemalloc
+        self._started = time.perf_counter()
+        self._seconds = None
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name: str):
+        '''Times (and samples the memory of) the enclosed block as phase @param name.'''
+        if self.memory:
+            self._tracemalloc.reset_peak()
+        if self.profile is not None:
+            self.profile.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.profile is not None:
+                self.profile.disable()
+            self.phases[name] = {
+                'seconds': elapsed,
+                'peak_bytes': self._tracemalloc.get_traced_memory()[1] if self.memory else None,
+            }
+
+    def count(self, name: str, value: int):
+        '''Sets the counter @param name to @param value.'''
+        self.counters[name] = value
+
+    def stop(self):
+        '''Ends the profiled run, stops memory tracing.'''
+        self._seconds = time.perf_counter() - self._started
+        if self.memory and self._tracemalloc.is_tracing():
+            self._tracemalloc.stop()
+
+    @property
+    def seconds(self) -> float:
+        '''Wall time of the whole run (so far).'''
+        if self._seconds is None:
+            return time.perf_counter() - self._started
+        return self._seconds
+
+    def report(self) -> dict:
+        '''Returns the collected metrics, throughput is derived from the
+        'tokens' & 'lines' counters and the time spent in all phases.'''
+        phase_seconds = sum(phase['seconds'] for phase in self.phases.values())
+        throughput = {}
+        for counter in ('tokens', 'lines'):
+            if counter in self.counters and phase_seconds:
+                throughput[f'{counter}_per_second'] = self.counters[counter] / phase_seconds
+
+        peaks = [phase['peak_bytes'] for phase in self.phases.values()
+                 if phase['peak_bytes'] is not None]
+        return {
+            'version': REPORT_VERSION,
+            'source': self.source,
+            'seconds': self.seconds,
+            'peak_bytes': max(peaks) if peaks else None,
+            'phases': self.phases,
+            'counters': self.counters,
+            'throughput': throughput,
+        }
+
+    def to_json(self) -> str:
+        import json
+        return json.dumps(self.report(), indent=2)
+
+    def to_prometheus(self) -> str:
+        '''Returns the metrics in the Prometheus text exposition format
+        (gauges, labelled with the compiled source).'''
+        report = self.report()
+        source = _escape_label(self.source)
+        lines = []
+
+        def gauge(name: str, help_text: str, samples: Iterable):
+            lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name} gauge')
+            for labels, value in samples:
+                labels = ','.join([f'source="{source}"'] + labels)
+                lines.append(f'{METRIC_PREFIX}_{name}{{{labels}}} {value!r}')
+
+        phases = report['phases'].items()
+        gauge('phase_seconds', 'Wall time spent in a compiler phase.',
+              (([f'phase="{name}"'], phase['seconds']) for name, phase in phases))
+        if self.memory:
+            gauge('phase_peak_bytes', 'Peak traced memory during a compiler phase.',
+                  (([f'phase="{name}"'], phase['peak_bytes']) for name, phase in phases))
+        gauge('run_seconds', 'Wall time of the whole compile.', [([], report['seconds'])])
+        for name, value in report['counters'].items():
+            gauge(f'{name}_total', f'Number of {name.replace("_", " ")} processed.', [([], value)])
+        for name, value in report['throughput'].items():
+            gauge(name, f'Compiler throughput ({name.replace("_", " ")}).', [([], value)])
+        return '\n'.join(lines) + '\n'
+
+    def export(self, fmt: str = 'json') -> str:
+        '''Returns the metrics in the given format, \sa PROFILE_FORMATS.'''
+        if fmt not in PROFILE_FORMATS:
+            raise ValueError(f'unknown profile format {fmt!r}')
+        return self.to_json() if fmt == 'json' else self.to_prometheus()
+
+    def dump_cprofile(self, path: str):
+        '''Writes the captured cProfile stats (\sa pstats) to @param path.'''
+        if self.profile is None:
+            raise ValueError('profiler was created without cprofile capture')
+        self.profile.dump_stats(path)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def count_nodes(nodes: List) -> int:
+    '''Counts the AST nodes of @param nodes, \sa ast.py@iter_nodes.'''
+    return sum(1 for _ in iter_nodes(nodes))
+
+
+def counted(tokens: Iterable, counters: dict) -> Iterator:
+    '''Passes the token stream @param tokens through, keeps the number of
+    tokens & lines seen in @param counters (\sa Tokenizer.stream).'''
+    counters['tokens'] = counters['lines'] = 0
+    for tok in tokens:
+        counters['tokens'] += 1
+        counters['lines'] = tok.line + 1
+        yield tok
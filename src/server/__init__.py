@@ -0,0 +1,32 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the persistent compile server, which keeps the front-end warm
+and compiles requests sent over a local Unix domain socket.
+@module protocol => compact binary wire format (requests & responses)
+@module daemon   => the (threaded) server, \sa __main__ --serve
+@module client   => client connection, \sa __main__ (forwarding mode)
+Note: Importing this package is cheap, socket machinery is only pulled in
+      by @module daemon & @module client.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+import os
+
+# Overrides the default socket location, \sa default_socket_path
+SOCKET_ENV = 'ASTRO_SERVER_SOCKET'
+
+
+def default_socket_path() -> str:
+    '''Returns the socket the server listens on by default: $ASTRO_SERVER_SOCKET,
+    otherwise a per-user socket in $XDG_RUNTIME_DIR (or /tmp).'''
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    directory = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return os.path.join(directory, f'astro-{os.getuid()}.sock')
@@ -0,0 +1,119 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the compile server client, \sa daemon.py@CompileServer.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from typing import Iterable, List
+from server import default_socket_path
+from server.protocol import (
+    Request, Response, encode_request, decode_response, read_frame, write_frame,
+    ProtocolError, REQ_PATH, REQ_SOURCE, REQ_PING, REQ_SHUTDOWN,
+)
+import socket
+import os
+
+
+class CompileClient:
+    '''Connection to a running compile server, requests on one connection
+    are answered in order (\sa compile_many for pipelining).
+    Usage:
+        with CompileClient() as client:
+            response = client.compile_path('main.astro')'''
+    def __init__(self, socket_path: str = None, timeout: float = None):
+        '''Connects to @param socket_path (default: \sa default_socket_path),
+        raises OSError if no server is listening.'''
+        self.socket_path = socket_path or default_socket_path()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(self.socket_path)
+        except OSError:
+            self._sock.close()
+            raise
+        self._rfile = self._sock.makefile('rb')
+        self._wfile = self._sock.makefile('wb')
+
+    def __enter__(self) -> 'CompileClient':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        try:
+            self._wfile.close()
+        except OSError:
+            pass  # server already gone, nothing left to flush
+        self._rfile.close()
+        self._sock.close()
+
+    def _send(self, request: Request):
+        write_frame(self._wfile, encode_request(request))
+
+    def _receive(self) -> Response:
+        payload = read_frame(self._rfile)
+        if payload is None:
+            raise ProtocolError('server closed the connection')
+        return decode_response(payload)
+
+    def request(self, request: Request) -> Response:
+        self._send(request)
+        self._wfile.flush()
+        return self._receive()
+
+    def compile_path(self, path: str, flags: int = 0) -> Response:
+        '''Compiles the file @param path (read by the server), \sa protocol.py
+        for the @param flags.'''
+        return self.request(Request(REQ_PATH, flags, os.path.abspath(path)))
+
+    def compile_source(self, source: str, name: str = '<source>', flags: int = 0) -> Response:
+        '''Compiles the in-memory @param source, @param name is only used for output.'''
+        return self.request(Request(REQ_SOURCE, flags, name, source.encode()))
+
+    def compile_many(self, paths: Iterable[str], flags: int = 0) -> List[Response]:
+        '''Compiles all @param paths, every request is sent before the first
+        response is read, so there's no round trip per file.'''
+        paths = list(paths)
+        for path in paths:
+            self._send(Request(REQ_PATH, flags, os.path.abspath(path)))
+        self._wfile.flush()
+        return [self._receive() for _ in paths]
+
+    def ping(self) -> bool:
+        return self.request(Request(REQ_PING)).ok
+
+    def shutdown(self):
+        '''Stops the server once the answer to this request has been sent.'''
+        self.request(Request(REQ_SHUTDOWN))
+
+
+def connect(socket_path: str = None, timeout: float = None) -> CompileClient | None:
+    '''Returns a client connected to the server on @param socket_path,
+    None if no server is listening there.'''
+    socket_path = socket_path or default_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        return CompileClient(socket_path, timeout)
+    except OSError:
+        return None
+
+
+def stop_server(socket_path: str = None) -> bool:
+    '''Shuts the server on @param socket_path down, False if none was running.'''
+    client = connect(socket_path)
+    if client is None:
+        return False
+    with client:
+        try:
+            client.shutdown()
+        except (OSError, ProtocolError):
+            return False  # (already) shutting down
+    return True
@@ -0,0 +1,248 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the compile server. Every connection gets its own thread and
+may send any number of requests (\sa protocol.py), which are answered in
+order. Tokenizer & Parser stay imported between requests and outcomes are
+memoized by source content, so repeated compiles are answered right away.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from collections import OrderedDict
+from server import default_socket_path
+from server.protocol import (
+    Request, Response, ProtocolError, encode_response, decode_request, mark_cached,
+    read_frame, write_frame, REQ_PATH, REQ_SOURCE, REQ_PING, REQ_SHUTDOWN,
+    WANT_TOKENS, WANT_AST, STATUS_OK, STATUS_FAILED, STATUS_ERROR,
+)
+from tokenization.AstroFile import AstroFile
+from tokenization.Tokenizer import Tokenizer
+from tokenization.TokenDump import dump_binary
+from parse.analysis import NodeStats, SymbolCollector
+from parse.visitor import PassManager
+from parse.parser import Parser
+from driver import capture_output
+from utils import use_colors
+import socketserver
+import threading
+import traceback
+import hashlib
+import socket
+import time
+import sys
+import os
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    '''Answers the requests of a single connection, in order.'''
+    def handle(self):
+        astro = self.server.astro
+        while True:
+            try:
+                payload = read_frame(self.rfile)
+                if payload is None:
+                    return
+                request = decode_request(payload)
+            except (ProtocolError, OSError) as e:
+                astro.log(f'dropped connection: {e}')
+                return
+
+            if request.kind == REQ_SHUTDOWN:
+                write_frame(self.wfile, encode_response(Response(STATUS_OK)))
+                self.wfile.flush()
+                # shutdown() blocks until serve_forever() returned
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+            write_frame(self.wfile, astro.handle(request))
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CompileServer:
+    '''Long-running compile server listening on @member socket_path.
+    @member cache     optional on-disk compile cache (\sa cache.py)
+    @member memo      content digest => encoded response (LRU, bounded by
+                      @member memo_bytes)'''
+    def __init__(self, socket_path: str = None, cache_dir: str = None,
+                 memo_bytes: int = 64 << 20, verbose: bool = False):
+        self.socket_path = socket_path or default_socket_path()
+        self.verbose = verbose
+        self.cache = None
+        if cache_dir is not None:
+            from cache import CompileCache
+            self.cache = CompileCache(cache_dir)
+
+        self.memo = OrderedDict()
+        self.memo_bytes = memo_bytes
+        self._memo_size = 0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.memo_hits = 0
+
+        # Diagnostics are captured per thread (\sa driver.py@capture_output),
+        # they go to the clients as plain text
+        use_colors(False)
+        self._server = None
+
+    def start(self):
+        '''Binds @member socket_path, a stale socket (no server answering)
+        is replaced, a live one raises OSError.'''
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+            else:
+                raise OSError(f'a compile server is already listening on {self.socket_path}')
+            finally:
+                probe.close()
+
+        self._server = _UnixServer(self.socket_path, _Handler)
+        self._server.astro = self
+        os.chmod(self.socket_path, 0o600)
+
+    def serve_forever(self):
+        if self._server is None:
+            self.start()
+        self.log(f'listening on {self.socket_path}')
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._server is None:
+            return
+        self._server.server_close()
+        self._server = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self.log(f'stopped after {self.requests} requests ({self.memo_hits} memoized)')
+
+    def log(self, msg: str):
+        print(f'[Server-Log] - {msg}', file=sys.stderr)
+
+    def handle(self, request: Request) -> bytes:
+        '''Returns the encoded response to @param request.'''
+        with self._lock:
+            self.requests += 1
+
+        if request.kind == REQ_PING:
+            return encode_response(Response(STATUS_OK))
+        if request.kind == REQ_PATH:
+            try:
+                with open(request.name, 'rb') as f:
+                    source = f.read()
+            except OSError as e:
+                return encode_response(Response(STATUS_ERROR, diagnostics=[f'[Server-Error] - {e}']))
+        elif request.kind == REQ_SOURCE:
+            source = request.source
+        else:
+            return encode_response(Response(
+                STATUS_ERROR, diagnostics=[f'[Server-Error] - unknown request kind {request.kind}']
+            ))
+
+        key = hashlib.blake2b(source, digest_size=16).digest() + bytes([request.flags])
+        with self._lock:
+            response = self.memo.get(key)
+            if response is not None:
+                self.memo.move_to_end(key)
+                self.memo_hits += 1
+                return mark_cached(response)
+
+        start = time.perf_counter()
+        response = self.compile(request.name or '<source>', source, request.flags)
+        if self.verbose:
+            self.log(f'{request.name or "<source>"} compiled in {time.perf_counter() - start:.4f}s')
+
+        with self._lock:
+            if key not in self.memo:
+                self.memo[key] = response
+                self._memo_size += len(response)
+                while self._memo_size > self.memo_bytes and len(self.memo) > 1:
+                    self._memo_size -= len(self.memo.popitem(last=False)[1])
+        return response
+
+    def compile(self, name: str, source: bytes, flags: int = 0) -> bytes:
+        '''Runs the front-end on @param source, everything the pipeline
+        outputs is captured as diagnostics, fatal errors (exit() calls) and
+        internal errors (with their traceback) fail the response instead of
+        terminating the server or dropping the connection.'''
+        status = STATUS_OK
+        cached = False
+        toks, ast = None, []
+
+        start = time.perf_counter()
+        with capture_output() as output:
+            try:
+                entry = key = None
+                if self.cache is not None:
+                    key = self.cache.key(source)
+                    entry = self.cache.get(key)
+
+                if entry is not None:
+                    toks, ast = entry.tokens, entry.ast
+                    cached = True
+                else:
+                    toks = Tokenizer(AstroFile.from_source(source.decode(), name)).tokenize()
+                    parser = Parser(toks)
+                    ast = parser.parse()
+                    if self.cache is not None:
+                        self.cache.put(key, toks, ast, parser.declarations)
+            except SystemExit:
+                status = STATUS_FAILED
+            except UnicodeDecodeError as e:
+                output.write(f'[Server-Error] - {name}: {e}\n')
+                status = STATUS_ERROR
+            except Exception:
+                # A front-end bug fails this request only, never the connection
+                output.write(f'[Server-Error] - {name}: internal compiler error:\n'
+                             f'{traceback.format_exc()}')
+                status = STATUS_ERROR
+        seconds = time.perf_counter() - start
+
+        # Node counts & declarations in a single walk, \sa parse/visitor.py
+        stats, symbols = NodeStats(), SymbolCollector()
+        PassManager([stats, symbols] if flags & WANT_AST else [stats]).run(ast)
+        node_counts = stats.counts
+        declarations = symbols.declarations if flags & WANT_AST else []
+        response = Response(
+            status, cached,
+            toks.line_count if toks is not None else 0,
+            len(toks) if toks is not None else 0,
+            len(ast), sum(node_counts.values()), seconds,
+            [line for line in output.getvalue().splitlines() if line.strip()],
+            None, declarations, dict(node_counts) if flags & WANT_AST else {},
+        )
+        token_dump = b''
+        if flags & WANT_TOKENS and toks is not None:
+            token_dump = dump_binary(toks)
+        return encode_response(response, token_dump)
+
+
+def serve(socket_path: str = None, cache_dir: str = None, verbose: bool = False) -> int:
+    '''Runs a compile server until it's shut down (\sa client.py@stop_server)
+    or interrupted.'''
+    server = CompileServer(socket_path, cache_dir, verbose=verbose)
+    try:
+        server.start()
+    except OSError as e:
+        print(f'[Server-Error] - {e}', file=sys.stderr)
+        return 1
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,206 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the compile server's wire format. Every message is a frame,
+all integers are little endian:
+    frame    := length:u32 payload
+    request  := 'ASXQ' version:u8 kind:u8 flags:u8 name:str source:bytes
+    response := 'ASXR' version:u8 status:u8 cached:u8
+                lines:u32 tokens:u32 expressions:u32 nodes:u32 seconds:f64
+                diagnostics:u32 str*                  (count, strings)
+                token_dump:bytes                      (\sa TokenDump.dump_binary)
+                declarations:u32 (name:str arity:u16)*
+                node_counts:u32 (class:str count:u32)*
+    str      := bytes (utf-8)
+    bytes    := length:u32 byte*
+Token dumps & AST summaries are empty unless requested (\sa WANT_TOKENS,
+WANT_AST), so plain compiles only cost a few dozen bytes.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from typing import BinaryIO, Dict, List, NamedTuple, Tuple
+from tokenization.TokenDump import load_binary
+from tokenization.Tokens import TokenBuffer
+import struct
+
+PROTOCOL_VERSION = 1
+REQUEST_MAGIC = b'ASXQ'
+RESPONSE_MAGIC = b'ASXR'
+
+# Frames above this size are rejected (corrupt or hostile peers)
+MAX_FRAME = 1 << 30
+
+# Request kinds
+REQ_PATH, REQ_SOURCE, REQ_PING, REQ_SHUTDOWN = range(4)
+
+# Request flags
+WANT_TOKENS = 1
+WANT_AST = 2
+
+# Response status
+STATUS_OK, STATUS_FAILED, STATUS_ERROR = range(3)
+
+_FRAME = struct.Struct('<I')
+_REQUEST = struct.Struct('<4sBBB')
+_RESPONSE = struct.Struct('<4sBBBIIIId')
+_RESPONSE_CACHED_OFFSET = 6  # magic (4), version, status
+_U32 = _FRAME
+_U16 = struct.Struct('<H')
+
+
+class ProtocolError(Exception):
+    '''Raised on malformed frames or messages.'''
+
+
+class Request(NamedTuple):
+    kind: int
+    flags: int = 0
+    name: str = ''
+    source: bytes = b''
+
+
+class Response(NamedTuple):
+    '''Compile outcome as sent by the server.
+    @member status       STATUS_OK, STATUS_FAILED (fatal compile error) or
+                         STATUS_ERROR (unreadable source, bad request)
+    @member tokens       token count, the tokens themselves are in
+                         @member token_buffer if they were requested
+    @member declarations (name, arity) of every declaration
+    @member node_counts  AST node class name => count'''
+    status: int
+    cached: bool = False
+    lines: int = 0
+    tokens: int = 0
+    expressions: int = 0
+    nodes: int = 0
+    seconds: float = 0.0
+    diagnostics: List[str] = []
+    token_buffer: TokenBuffer | None = None
+    declarations: List[Tuple[str, int]] = []
+    node_counts: Dict[str, int] = {}
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+
+def _pack_bytes(parts: list, data: bytes):
+    parts.append(_U32.pack(len(data)))
+    parts.append(data)
+
+
+class _Reader:
+    '''Sequential reader over a message payload.'''
+    __slots__ = ('data', 'pos')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        if self.pos + fmt.size > len(self.data):
+            raise ProtocolError('truncated message')
+        values = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def bytes(self) -> bytes:
+        length, = self.unpack(_U32)
+        if self.pos + length > len(self.data):
+            raise ProtocolError('truncated message')
+        self.pos += length
+        return bytes(self.data[self.pos - length:self.pos])
+
+    def str(self) -> str:
+        return self.bytes().decode()
+
+
+def encode_request(request: Request) -> bytes:
+    parts = [_REQUEST.pack(REQUEST_MAGIC, PROTOCOL_VERSION, request.kind, request.flags)]
+    _pack_bytes(parts, request.name.encode())
+    _pack_bytes(parts, request.source)
+    return b''.join(parts)
+
+
+def decode_request(data: bytes) -> Request:
+    reader = _Reader(data)
+    magic, version, kind, flags = reader.unpack(_REQUEST)
+    if magic != REQUEST_MAGIC or version != PROTOCOL_VERSION:
+        raise ProtocolError(f'unsupported request (magic {magic!r}, version {version})')
+    return Request(kind, flags, reader.str(), reader.bytes())
+
+
+def encode_response(response: Response, token_dump: bytes = b'') -> bytes:
+    '''Encodes @param response, the tokens are passed as @param token_dump
+    (\sa TokenDump.dump_binary), @member Response.token_buffer is ignored.'''
+    parts = [_RESPONSE.pack(
+        RESPONSE_MAGIC, PROTOCOL_VERSION, response.status, response.cached,
+        response.lines, response.tokens, response.expressions, response.nodes,
+        response.seconds,
+    )]
+    parts.append(_U32.pack(len(response.diagnostics)))
+    for diagnostic in response.diagnostics:
+        _pack_bytes(parts, diagnostic.encode())
+    _pack_bytes(parts, token_dump)
+    parts.append(_U32.pack(len(response.declarations)))
+    for name, arity in response.declarations:
+        _pack_bytes(parts, name.encode())
+        parts.append(_U16.pack(min(arity, 0xFFFF)))
+    parts.append(_U32.pack(len(response.node_counts)))
+    for name, count in response.node_counts.items():
+        _pack_bytes(parts, name.encode())
+        parts.append(_U32.pack(count))
+    return b''.join(parts)
+
+
+def mark_cached(data: bytes) -> bytes:
+    '''Returns the encoded response @param data with its cached flag set.'''
+    offset = _RESPONSE_CACHED_OFFSET
+    return data[:offset] + b'\x01' + data[offset + 1:]
+
+
+def decode_response(data: bytes) -> Response:
+    reader = _Reader(data)
+    magic, version, status, cached, lines, tokens, expressions, nodes, seconds = \
+        reader.unpack(_RESPONSE)
+    if magic != RESPONSE_MAGIC or version != PROTOCOL_VERSION:
+        raise ProtocolError(f'unsupported response (magic {magic!r}, version {version})')
+
+    diagnostics = [reader.str() for _ in range(reader.unpack(_U32)[0])]
+    token_dump = reader.bytes()
+    declarations = [(reader.str(), reader.unpack(_U16)[0])
+                    for _ in range(reader.unpack(_U32)[0])]
+    node_counts = {}
+    for _ in range(reader.unpack(_U32)[0]):
+        name = reader.str()
+        node_counts[name] = reader.unpack(_U32)[0]
+
+    return Response(
+        status, bool(cached), lines, tokens, expressions, nodes, seconds, diagnostics,
+        load_binary(token_dump) if token_dump else None, declarations, node_counts,
+    )
+
+
+def write_frame(stream: BinaryIO, payload: bytes):
+    stream.write(_FRAME.pack(len(payload)) + payload)
+
+
+def read_frame(stream: BinaryIO) -> bytes | None:
+    '''Reads the next frame's payload, None once the peer closed the stream.'''
+    header = stream.read(_FRAME.size)
+    if not header:
+        return None
+    if len(header) != _FRAME.size:
+        raise ProtocolError('truncated frame header')
+    length, = _FRAME.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f'frame of {length} bytes exceeds the limit')
+    payload = stream.read(length)
+    if len(payload) != length:
+        raise ProtocolError('truncated frame')
+    return payload
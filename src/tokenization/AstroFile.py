@@ -7,11 +7,13 @@
 # Dunder Credentials
 # ===================================
 __author__  = 'xyLotus, bellrise'
-__version__ = '0.0.5'
+__version__ = '0.0.6'
 # ===================================
 # Imports
 # ===================================
-import re
+from typing import Iterable, Iterator
+import mmap
+import os
 
 
 class AstroFile:
@@ -19,45 +21,173 @@ class AstroFile:
     it __repr__'s the given file's @member file_name
     content and will probably be able to do various file operations. """
 
-    def __init__(self, file_name: str, cleanup: bool = True):
+    def __init__(self, file_name: str, cleanup: bool = True, stream: bool = False,
+                 memory_map: bool = False):
         """Prepare the file for use.
         :param file_name: path to the file
         :param cleanup: remove comments from the file
+        :param stream: don't read the file up front, the content is only
+                       yielded line by line through @method lines
+        :param memory_map: map the file read-only into @member source instead
+                           of reading it, the lexer then works on the raw
+                           bytes and skips comments itself (@param cleanup
+                           and @param stream don't apply), \sa close
         """
         self.file_name = str(file_name)
         self.content = ""
+        self.source = b""
+        self.cleanup = cleanup
+        self.stream = stream and not memory_map
+        self.memory_map = memory_map
 
         try:
+            if memory_map:
+                with open(file_name, 'rb') as f:
+                    # Empty files can't be mapped
+                    if os.fstat(f.fileno()).st_size:
+                        self.source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                return
+
+            if self.stream:
+                # Only check for existence, reading happens in @method lines
+                open(file_name, 'r').close()
+                return
+
             with open(file_name, 'r') as f:
-                self.content = f.read()
+                if cleanup:
+                    # Comments are stripped while reading, line by line, so
+                    # the raw content is never held in memory as a whole.
+                    self.content = '\n'.join(strip_comments(_iter_lines(f)))
+                else:
+                    self.content = f.read()
         except FileNotFoundError:
             print(f'[FileRead-Error-FATAL]: File ["{self.file_name}"] not found.')
             exit(1)
 
+    @classmethod
+    def from_source(cls, content: str, file_name: str = '<source>',
+                    cleanup: bool = True) -> 'AstroFile':
+        """Wraps in-memory @param content (e.g. sent to the compile server)
+        without touching the file system, @param file_name is only used
+        for output."""
+        h_file = cls.__new__(cls)
+        h_file.file_name = str(file_name)
+        h_file.source = b""
+        h_file.cleanup = cleanup
+        h_file.stream = False
+        h_file.memory_map = False
+        h_file.content = content
         if cleanup:
-            self._cleanup()
+            h_file.content = '\n'.join(strip_comments(content.split('\n')))
+        return h_file
+
+    def lines(self) -> Iterator[str]:
+        """Yields the (cleaned up) content line by line. In stream mode the
+        file is read lazily, so only the current line is held in memory."""
+        if self.memory_map:
+            lines = self._mapped_lines()
+            yield from strip_comments(lines) if self.cleanup else lines
+            return
+
+        if not self.stream:
+            yield from self.content.split('\n')
+            return
+
+        with open(self.file_name, 'r') as f:
+            if self.cleanup:
+                yield from strip_comments(_iter_lines(f))
+            else:
+                yield from _iter_lines(f)
+
+    def _mapped_lines(self) -> Iterator[str]:
+        """Yields the lines of the mapping like str.split('\\n') would, only
+        a single line is copied out of it & decoded at a time."""
+        source = self.source
+        start = 0
+        while True:
+            end = source.find(b'\n', start)
+            if end == -1:
+                yield source[start:].decode()
+                return
+            yield source[start:end].decode()
+            start = end + 1
+
+    def close(self) -> None:
+        """Unmaps a memory-mapped file, tokens lexed over the mapping
+        (\sa TokenBuffer.source) can't be materialized anymore afterwards."""
+        if self.memory_map and not isinstance(self.source, bytes):
+            self.source.close()
+            self.source = b""
+
+    def __enter__(self) -> 'AstroFile':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     def __repr__(self):
         return self.content
 
     def _cleanup(self) -> None:
         """Removes comments from the source file. """
+        self.content = '\n'.join(strip_comments(self.content.split('\n')))
+
+
+def _iter_lines(stream: Iterable[str]) -> Iterator[str]:
+    """Yields the lines of a text stream without their line terminator,
+    exactly like str.split('\\n') would split its whole content."""
+    line = ''
+    for line in stream:
+        yield line[:-1] if line.endswith('\n') else line
+
+    if line == '' or line.endswith('\n'):
+        yield ''
+
+
+def strip_comments(lines: Iterable[str]) -> Iterator[str]:
+    """Removes comments from the given lines in a single scan.
+    Block comments (;; ... ;;) may span several lines and are replaced with
+    spaces, so line and column offsets of the remaining code stay intact,
+    line comments (; ...) cut the rest of the line. An unterminated block
+    comment runs until the end of the input.
+    Note: Every yielded line is rstripped and free of carriage returns."""
+    in_block = False
+    for line in lines:
+        line, in_block = strip_line(line, in_block)
+        yield line
+
+
+def strip_line(line: str, in_block: bool) -> tuple:
+    """Removes the comments of a single line, \sa strip_comments.
+    @param in_block tells whether the line starts inside a block comment,
+    returns the stripped line & whether the next line does."""
+    if '\r' in line:
+        line = line.replace('\r', '')
+
+    pieces = []
+    pos = 0
+    if in_block:
+        close = line.find(';;')
+        if close == -1:
+            return '', True
+        pos = close + 2
+        pieces.append(' ' * pos)
+
+    while True:
+        semi = line.find(';', pos)
+        if semi == -1:
+            pieces.append(line[pos:])
+            break
 
-        content: str = self.content.replace('\r', '')
+        pieces.append(line[pos:semi])
+        if not line.startswith(';;', semi):
+            break  # line comment
 
-        result = re.finditer(r'(;;[\n\w\s]*;;)+', content)
-        for match in result:
-            # The reason I'm not using .replace on a string here is because
-            # I would be cutting out every single instance which might come
-            # up in a later match.
-            spaces = ' ' * (match.span()[1] - match.span()[0])
-            content = content[:match.span()[0]] + spaces \
-                + content[match.span()[1]:]
+        close = line.find(';;', semi + 2)
+        if close == -1:
+            return ''.join(pieces).rstrip(), True
 
-        lines = content.split('\n')
-        for index, line in enumerate(lines):
-            match = re.match(r'^[^;]*(?P<comment>;.*)$', line)
-            if match:
-                lines[index] = line.replace(match.group('comment'), '')
+        pos = close + 2
+        pieces.append(' ' * (pos - semi))
 
-        self.content = '\n'.join([s.rstrip() for s in lines])
\ No newline at end of file
+    return ''.join(pieces).rstrip(), False
@@ -0,0 +1,80 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the interned identifier table shared between
+the tokenizer and the parser.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from tokenization.Tokens import TokenBuffer, TokenType
+from typing import Iterator
+from array import array
+import sys
+
+
+class SymbolTable:
+    '''Shared string table, maps every identifier onto a dense integer id.
+    Each distinct name is stored exactly once, so every token & AST node
+    naming it shares the same (interned) str object and names compare &
+    hash in O(1).
+    @member ids   name => id
+    @member names id => name'''
+    __slots__ = ('ids', 'names')
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def intern(self, name: str) -> int:
+        '''Returns the id of @param name, adding it to the table if needed.'''
+        id_ = self.ids.get(name)
+        if id_ is None:
+            id_ = len(self.names)
+            name = sys.intern(name)
+            self.ids[name] = id_
+            self.names.append(name)
+        return id_
+
+    def canonical(self, name: str) -> str:
+        '''Returns the shared str object for @param name.'''
+        return self.names[self.intern(name)]
+
+    def lookup(self, name: str) -> int | None:
+        '''Returns the id of @param name, None if it was never interned.'''
+        return self.ids.get(name)
+
+    def __repr__(self):
+        return f'SymbolTable(symbols={len(self.names)})'
+
+
+def intern_names(buffer: TokenBuffer, symbols: SymbolTable) -> TokenBuffer:
+    '''Interns every NAME token of @param buffer into @param symbols and
+    attaches the table to the buffer, NAME tokens materialized from it
+    afterwards share the interned value (\sa TokenBuffer.__getitem__).'''
+    source = buffer.source
+    decode = type(source) is not str
+    intern = symbols.intern
+    symbol_ids = array('I', bytes(4 * len(buffer.types)))
+    for index, id_ in enumerate(buffer.types):
+        if id_ == TokenType.NAME:
+            start = buffer.starts[index]
+            value = source[start:start + buffer.lengths[index]]
+            symbol_ids[index] = intern(value.decode() if decode else value)
+
+    buffer.symbols = symbols
+    buffer.symbol_ids = symbol_ids
+    return buffer
@@ -0,0 +1,145 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the (opt-in) token dump writers and the
+reader loading binary dumps back into a TokenBuffer.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from tokenization.Tokens import Token, TokenType, TokenBuffer
+from typing import List
+from array import array
+import struct
+import sys
+
+# Binary dump layout (little endian):
+#   header       => magic, version, source kind, token count, line count, source size
+#   columns      => types (u16), starts, lengths, lines (u32) [token count each]
+#   line_offsets => u32 [line count]
+#   source       => utf-8 encoded str source / raw bytes source
+BINARY_MAGIC = b'ASXT'
+BINARY_VERSION = 1
+_HEADER = struct.Struct('<4sHBIIQ')
+_STR_SOURCE, _BYTES_SOURCE = 0, 1
+
+TEXT_DUMP_BUFFER = 1 << 16
+
+
+def _text_dump_header(file_name: str) -> str:
+    return ("========================================================================\n"
+            f"Auto-generated Astro tokenization log of file: [{file_name}]\n"
+            "========================================================================\n")
+
+
+def write_text_dump(tokens: TokenBuffer, path: str, file_name: str = ''):
+    '''Writes the human readable token log (one source line per line)
+    through a buffered writer, straight from the buffer columns.'''
+    names = TokenType.NAMES
+    types, lines, value = tokens.types, tokens.lines, tokens.value
+
+    with open(path, 'w', buffering=TEXT_DUMP_BUFFER) as f:
+        f.write(_text_dump_header(file_name))
+
+        index = 0
+        for line in range(tokens.line_count):
+            parts = []
+            while index < len(types) and lines[index] == line:
+                parts.append(f'<Token id={names.get(types[index], "NONE")} value=\'{value(index)}\'> ')
+                index += 1
+            parts.append('\n')
+            f.write(''.join(parts))
+
+
+class TextDumpWriter:
+    '''Writes the token log of @method write_text_dump a line at a time,
+    for tokens which are never held as a whole (\sa Tokenizer.stream).'''
+    def __init__(self, path: str, file_name: str = ''):
+        self._names = TokenType.NAMES
+        self._file = open(path, 'w', buffering=TEXT_DUMP_BUFFER)
+        self._file.write(_text_dump_header(file_name))
+
+    def write_line(self, tokens: List[Token]):
+        names = self._names
+        self._file.write(''.join(
+            [f'<Token id={names.get(tok.id, "NONE")} value=\'{tok.value}\'> ' for tok in tokens]
+        ) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+def _le(column: array) -> bytes:
+    '''Returns the little endian bytes of an array column.'''
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def dump_binary(tokens: TokenBuffer) -> bytes:
+    '''Returns the compact binary dump of @param tokens, \sa load_binary.'''
+    if isinstance(tokens.source, str):
+        kind, source = _STR_SOURCE, tokens.source.encode()
+    else:
+        kind, source = _BYTES_SOURCE, bytes(tokens.source)
+
+    parts = [_HEADER.pack(
+        BINARY_MAGIC, BINARY_VERSION, kind,
+        len(tokens), tokens.line_count, len(source)
+    )]
+    for column in (tokens.types, tokens.starts, tokens.lengths, tokens.lines, tokens.line_offsets):
+        parts.append(_le(column))
+    parts.append(source)
+    return b''.join(parts)
+
+
+def load_binary(data: bytes) -> TokenBuffer:
+    '''Loads a binary dump (\sa dump_binary) back into a TokenBuffer,
+    which can be replayed through the Parser like a freshly lexed one.'''
+    magic, version, kind, count, line_count, size = _HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError('not an Astro token dump')
+    if version != BINARY_VERSION:
+        raise ValueError(f'unsupported token dump version {version}')
+
+    if len(data) < _HEADER.size + 14 * count + 4 * line_count + size:
+        raise ValueError('truncated Astro token dump')
+
+    view = memoryview(data)
+    pos = _HEADER.size
+
+    def column(typecode: str, length: int) -> array:
+        nonlocal pos
+        col = array(typecode)
+        end = pos + length * col.itemsize
+        col.frombytes(view[pos:end])
+        if sys.byteorder == 'big':
+            col.byteswap()
+        pos = end
+        return col
+
+    types = column('H', count)
+    starts, lengths, lines = column('I', count), column('I', count), column('I', count)
+    line_offsets = column('I', line_count)
+
+    source = bytes(view[pos:pos + size])
+    buffer = TokenBuffer(source.decode() if kind == _STR_SOURCE else source, line_offsets)
+    buffer.types, buffer.starts, buffer.lengths, buffer.lines = types, starts, lengths, lines
+    return buffer
+
+
+def write_binary_dump(tokens: TokenBuffer, path: str):
+    '''Writes the compact binary dump of @param tokens to @param path.'''
+    with open(path, 'wb') as f:
+        f.write(dump_binary(tokens))
+
+
+def read_binary_dump(path: str) -> TokenBuffer:
+    '''Loads the binary dump at @param path, \sa load_binary.'''
+    with open(path, 'rb') as f:
+        return load_binary(f.read())
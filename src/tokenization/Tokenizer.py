@@ -8,35 +8,59 @@ for each line in the passed file @class Lexer.'''
 # Dunder Credentials
 # ===================================
 __author__  = 'xyLotus'
-__version__ = '0.1.0' 
+__version__ = '0.2.0' 
 # ===================================
 # Imports
 # ===================================
-from tokenization.Tokens import Token, TokenType
+from tokenization.Tokens import Token, TokenType, TokenBuffer
 from tokenization.AstroFile import AstroFile 
-from typing import List
+from tokenization.Symbols import SymbolTable, intern_names
+from tokenization.TokenDump import write_text_dump, write_binary_dump, TextDumpWriter
+from typing import Iterator, List
+from array import array
 import re
 
 
+# Default token dump destinations per format
+DUMP_PATHS = {
+    'text':   '_asx_token_log.log',
+    'binary': '_asx_tokens.bin',
+}
+
+
 class Tokenizer:
     """ This class tokenizes the given files
-    given in @member h_file and returns the tokens
-    per line uncompressed and raw. """
+    given in @member h_file and returns the final
+    (NAME/NUMBER/punctuation) tokens as a @class TokenBuffer. """
 
-    def __init__(self, h_file: AstroFile, save_tokens=True):
+    def __init__(self, h_file: AstroFile, save_tokens=False, dump_format='text',
+                 dump_path=None, symbols: SymbolTable = None):
         """Members & Usage:
         @member file = file to be tokenized,
-        @member tokens = token list (used in @method tokenize)"""
+        @member tokens = token buffer (used in @method tokenize)
+        @param save_tokens = dump the tokens after @method tokenize,
+        @param dump_format = 'text' (human readable log) or 'binary'
+                             (\sa TokenDump.read_binary_dump),
+        @param dump_path = dump destination, defaults to DUMP_PATHS[dump_format],
+        @param symbols = identifier table the NAME tokens get interned into,
+                         (\sa Symbols.SymbolTable), None => no interning."""
+        if dump_format not in DUMP_PATHS:
+            raise ValueError(f'unknown token dump format {dump_format!r}')
+
         self.is_compressed = False
+        self.save_tokens = save_tokens
+        self.dump_format = dump_format
+        self.dump_path = dump_path or DUMP_PATHS[dump_format]
         self.h_file = h_file
-        self.tokens = []
+        self.symbols = symbols
+        self.tokens = TokenBuffer()
         self.content = self.h_file.content
 
     def output_tokens(self):
         """ Outputs tokens in human easy-to-read format
         for debugging and readability purposes. """
-        for line in self.tokens:
-            for tok in line:
+        for line in range(self.tokens.line_count):
+            for tok in self.tokens.line_tokens(line):
                 print(tok, end=' ')
             print()
 
@@ -49,98 +73,229 @@ class Tokenizer:
             exit(1)
 
         context_list = []
-        sources = self.content.split('\n')
-        for i, line in enumerate(self.tokens):
+        # Mapped files are decoded line by line, never as a whole
+        sources = self.h_file.lines() if self.h_file.memory_map else iter(self.content.split('\n'))
+        for i in range(self.tokens.line_count):
             context_list.append({
                 'line': i + 1,
-                'source': sources[i],   
-                'tokens': self.tokens[i]
+                'source': next(sources, ''),
+                'tokens': self.tokens.line_tokens(i)
             })
 
         return context_list
 
-    def tokenize(self) -> list:
+    def tokenize(self, workers: int = 1) -> TokenBuffer:
         """ Tokenizes given file by accessing file handle
-        @member h_file (AstroFile) and storing the tokens in @member tokens."""
-        toks = []
-
-        type_map = {
-            ' ':  TokenType.SPACE,
-            '!':  TokenType.EXCL,
-            '(':  TokenType.LPAREN,
-            ')':  TokenType.RPAREN,
-            '<':  TokenType.LCHEV,
-            '>':  TokenType.RCHEV,
-            ':':  TokenType.COLON,
-            ',':  TokenType.COMMA,
-            '\'': TokenType.QUOTE,
-            '"':  TokenType.DBQUOTE,
-            '=':  TokenType.ASSIGN,
-        }
-
-        for line in self.content.split('\n'):
-            line_buffer = []
-            for i, ch in enumerate(line):
-                # TokenType is NUMBER if not connected to SYM before
-                typ = TokenType.NUMBER  if str(ch).isnumeric() \
-                                        and not line[i-1].isalpha() \
-                                        else type_map.get(ch, TokenType.SYM)
-                line_buffer.append(Token(typ, ch))
-            toks.append(line_buffer)
-
-        # Compress all required tokens
-        toks = self._compress(toks, TokenType.SYM, TokenType.NAME)
+        @member h_file (AstroFile) and storing the tokens in @member tokens.
+        @param workers > 1 lexes large (non memory-mapped) files in line
+        aligned chunks on that many processes, \sa lex_parallel."""
+        if self.h_file.stream:
+            self.content = '\n'.join(self.h_file.lines())
+
+        # Memory-mapped files are lexed over their raw bytes, token values
+        # only get decoded once they're materialized.
+        toks = TokenBuffer(self.h_file.source if self.h_file.memory_map else self.content)
+        if workers > 1 and not self.h_file.memory_map:
+            lex_parallel(toks, workers)
+        else:
+            lex_into(toks)
+        if self.symbols is not None:
+            intern_names(toks, self.symbols)
 
         self.tokens = toks
+        self.is_compressed = True
         
         # Save tokens to log file if @param save_tokens is True
-        with open('_asx_token_log.log', 'w') as f:   
-            f.write("========================================================================\n")
-            f.write(f"Auto-generated Astro tokenization log of file: [{self.h_file.file_name}]\n")
-            f.write("========================================================================\n")
-            for line in toks:
-                for token in line:
-                    f.write(str(token) + ' ')
-                f.write('\n')
+        if self.save_tokens:
+            if self.dump_format == 'binary':
+                write_binary_dump(toks, self.dump_path)
+            else:
+                write_text_dump(toks, self.dump_path, self.h_file.file_name)
 
         return toks
 
-    def _compress(self, tokens: list, from_: int, to_: int) -> list:
-        """ Compresses the tokens into sub-tokens which
-        are smaller, ready for compilation and syntax lexing,
-        overwriting @member self.compressed_tokens. """
-        self.is_compressed = True
+    def stream(self) -> Iterator[Token]:
+        """ Generator counterpart of @method tokenize, lexes the lines of
+        @member h_file on demand and yields every token as soon as its line
+        has been read. Tokens never span lines, so nothing is buffered.
+        @param save_tokens writes the text dump line by line along the way,
+        binary dumps need all tokens up front (\sa write_binary_dump). """
+        dump = None
+        if self.save_tokens:
+            if self.dump_format != 'text':
+                raise ValueError(f'{self.dump_format} token dumps can\'t be streamed')
+            dump = TextDumpWriter(self.dump_path, self.h_file.file_name)
 
-        # compress token sets line by line
-        toks = []
-        for line in tokens:
-            value_buf = ""
-            line_buf = []
-
-            # line compression process
-            for i, tok in enumerate(line):
-                if tok.id != from_:
-                    line_buf.append(tok)
-
-                if i != len(line) - 1:  # End of Token Set!
-                    if tok.id == from_ and line[i+1].id == from_:
-                        value_buf += tok.value
-                    elif tok.id == from_ and line[i+1].id != from_:
-                        value_buf += tok.value
-
-                        line_buf.append(Token(id_=to_, value=value_buf))
-                        value_buf = ""
-                elif tok.id == from_:
-                    value_buf += tok.value
-                    
-                    line_buf.append(Token(id_=to_, value=value_buf))
-                    value_buf = ""  # clear buffer
-
-            toks.append(line_buf)
+        canonical = self.symbols.canonical if self.symbols is not None else None
+        try:
+            for line_index, line in enumerate(self.h_file.lines()):
+                tokens = lex_line(line, line_index)
+                if canonical is not None:
+                    for tok in tokens:
+                        if tok.id == TokenType.NAME:
+                            tok.value = canonical(tok.value)
+                if dump is not None:
+                    dump.write_line(tokens)
+                yield from tokens
+        finally:
+            if dump is not None:
+                dump.close()
 
-        return toks
 
-        # NOTE -> Past me, I really don't like the fact that you forgot to COMMENT on this,
-        #         I'm sitting here, confused as fuck, trying to understand this code,
-        #         yet all I understand is... about nothing. The code styling doesn't look
-        #         bad as well as the code itself I suppose, but fuck man, at least tell me whats going on...
+# Single character tokens, everything that is not listed here (or a space)
+# belongs to a NAME, apart from a leading digit which starts a NUMBER.
+PUNCT_MAP = {
+    '!':  TokenType.EXCL,
+    '(':  TokenType.LPAREN,
+    ')':  TokenType.RPAREN,
+    '<':  TokenType.LCHEV,
+    '>':  TokenType.RCHEV,
+    ':':  TokenType.COLON,
+    ',':  TokenType.COMMA,
+    '\'': TokenType.QUOTE,
+    '"':  TokenType.DBQUOTE,
+    '=':  TokenType.ASSIGN,
+    '+':  TokenType.PLUS,
+    '-':  TokenType.MINUS,
+    '*':  TokenType.STAR,
+    '/':  TokenType.SLASH,
+    '%':  TokenType.PERCENT,
+}
+
+_PUNCT_CLASS = re.escape(''.join(PUNCT_MAP))
+_NAME_BREAK  = f' \\t\\n{_PUNCT_CLASS}'
+
+# Master pattern, the alternatives are tried in order and every one of them
+# munches as many characters as possible. The group index (@lastindex) of a
+# match is mapped onto the token type through @var _GROUP_TYPES.
+TOKEN_PATTERN = re.compile(
+    f'([^0-9{_NAME_BREAK}][^{_NAME_BREAK}]*)'   # NAME
+    f'|([0-9]+)'                                # NUMBER
+    f'|([ \\t]+)'                               # SPACE
+    f'|([{_PUNCT_CLASS}])'                      # punctuation, \sa PUNCT_MAP
+    f'|(\\n)'                                   # line break (not emitted)
+)
+
+# Byte counterpart of @var TOKEN_PATTERN for memory-mapped sources, which
+# can't be cleaned up in place, hence comments (\sa AstroFile.strip_comments)
+# and carriage returns are matched and skipped by the lexer itself.
+BYTES_TOKEN_PATTERN = re.compile(
+    f'([^0-9;\\r{_NAME_BREAK}][^;\\r{_NAME_BREAK}]*)'.encode()
+    + b'|([0-9]+)'
+    + b'|([ \\t]+)'
+    + f'|([{_PUNCT_CLASS}])'.encode()
+    + b'|(\\n)'
+    + b'|(;;[\\s\\S]*?;;|;;[\\s\\S]*|;[^\\n]*|\\r)'  # skipped
+)
+BYTES_PUNCT_MAP = {ord(ch): typ for ch, typ in PUNCT_MAP.items()}
+
+_NEWLINE_GROUP = 5
+_SKIP_GROUP = 6
+_GROUP_TYPES = (None, TokenType.NAME, TokenType.NUMBER, TokenType.SPACE, None, None, None)
+
+
+def lex_line(line: str, line_index: int = 0) -> List[Token]:
+    """ Lexes a single comment free line into Tokens (\sa Tokenizer.stream). """
+    tokens = []
+    group_types, punct_map = _GROUP_TYPES, PUNCT_MAP
+    for match in TOKEN_PATTERN.finditer(line):
+        value = match.group()
+        typ = group_types[match.lastindex]
+        if typ is None:
+            typ = punct_map[value]
+        tokens.append(Token(typ, value, line_index, match.start()))
+    return tokens
+
+
+def lex_into(buffer: TokenBuffer, pos: int = 0, endpos: int = None, line: int = 0) -> int:
+    """ Lexes the @member source of @param buffer from @param pos to
+    @param endpos in one pass, appending the final tokens and line offsets
+    to the buffer. Returns the last line index. The source is either a
+    comment free str or the raw bytes (e.g. mmap) of an Astro file. """
+    source = buffer.source
+    if endpos is None:
+        endpos = len(source)
+
+    if isinstance(source, str):
+        pattern, punct_map, newline = TOKEN_PATTERN, PUNCT_MAP, '\n'
+    else:
+        pattern, punct_map, newline = BYTES_TOKEN_PATTERN, BYTES_PUNCT_MAP, b'\n'
+
+    types, starts = buffer.types.append, buffer.starts.append
+    lengths, lines = buffer.lengths.append, buffer.lines.append
+    line_offsets = buffer.line_offsets.append
+    group_types = _GROUP_TYPES
+
+    for match in pattern.finditer(source, pos, endpos):
+        index = match.lastindex
+        start, end = match.span()
+        if index == _NEWLINE_GROUP:
+            line += 1
+            line_offsets(end)
+            continue
+        elif index == _SKIP_GROUP:
+            # Block comments keep the lines they span
+            brk = source.find(newline, start, end)
+            while brk != -1:
+                line += 1
+                line_offsets(brk + 1)
+                brk = source.find(newline, brk + 1, end)
+            continue
+
+        typ = group_types[index]
+        if typ is None:
+            typ = punct_map[source[start]]
+        types(typ)
+        starts(start)
+        lengths(end - start)
+        lines(line)
+
+    return line
+
+
+# Sources smaller than this aren't worth the process round trip
+PARALLEL_MIN_CHUNK = 1 << 18
+
+
+def _lex_chunk(chunk: str) -> tuple:
+    """ Worker side of @func lex_parallel, lexes a chunk on its own
+    (offsets & lines relative to the chunk) and returns the columns. """
+    buffer = TokenBuffer(chunk)
+    lex_into(buffer)
+    return buffer.types, buffer.starts, buffer.lengths, buffer.lines, buffer.line_offsets
+
+
+def lex_parallel(buffer: TokenBuffer, workers: int):
+    """ Lexes the str @member source of @param buffer in line aligned chunks
+    on @param workers processes and stitches the chunk columns back together
+    in order, with the chunk offsets & line numbers added back on.
+    Note: Only valid for comment free sources, where lexing is line-local. """
+    source = buffer.source
+    chunk_size = max(PARALLEL_MIN_CHUNK, -(-len(source) // workers))
+
+    # Chunk boundaries are placed right after a line break
+    bounds = [0]
+    while bounds[-1] < len(source):
+        brk = source.find('\n', bounds[-1] + chunk_size)
+        bounds.append(len(source) if brk == -1 else brk + 1)
+
+    if len(bounds) <= 2:
+        lex_into(buffer)
+        return
+
+    # Imported on demand, the process pool machinery is slow to import
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = [source[start:end] for start, end in zip(bounds, bounds[1:])]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        results = list(pool.map(_lex_chunk, chunks))
+
+    del buffer.line_offsets[1:]
+    for base, (types, starts, lengths, lines, line_offsets) in zip(bounds, results):
+        first_line = len(buffer.line_offsets) - 1
+        buffer.types.extend(types)
+        buffer.starts.extend(array('I', map(base.__add__, starts)))
+        buffer.lengths.extend(lengths)
+        buffer.lines.extend(array('I', map(first_line.__add__, lines)))
+        # line_offsets[0] of a chunk is already known (previous chunk's break)
+        buffer.line_offsets.extend(array('I', map(base.__add__, line_offsets[1:])))
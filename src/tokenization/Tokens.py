@@ -8,9 +8,12 @@ associated wrapper class for efficient use."""
 # Dunder Credentials
 # ===================================
 __author__  = 'xyLotus, bellrise'
-__version__ = '0.1'
+__version__ = '0.2'
 # ===================================
+from bisect import bisect_left
+from itertools import compress
 from typing import List
+from array import array
 
 
 class TokenType:
@@ -42,26 +45,41 @@ class TokenType:
     DBQUOTE = 19  # "
 
     NUMBER  = 20  # [0-9]
+    PLUS    = 21  # +
+    MINUS   = 22  # -
 
     EOF     = 23
 
+    STAR    = 24  # *
+    SLASH   = 25  # /
+    PERCENT = 26  # %
+
     @staticmethod
     def get(id_) -> str:
         """Return the name of the token from the passed ID. Returns NONE by
         default. """
-        for name, value in TokenType.__dict__.items():
-            if value == id_:
-                return name
-        return 'NONE'
+        return TokenType.NAMES.get(id_, 'NONE')
+
+
+# O(1) reverse lookup table (id => name), \sa TokenType.get
+TokenType.NAMES = {
+    value: name for name, value in vars(TokenType).items()
+    if isinstance(value, int) and not name.startswith('_')
+}
 
 
 class Token:
     """This class represents a single Token which can then be put into a list
-    generated by the Tokenizer. """
+    generated by the Tokenizer. Tokens taken from a @class TokenBuffer are
+    short-lived views, the buffer itself only stores integer columns.
+    Note: @member line and @member col are 0-based."""
+    __slots__ = ('id', 'value', 'line', 'col')
 
-    def __init__(self, id_=TokenType.NONE, value=''):
+    def __init__(self, id_=TokenType.NONE, value='', line=0, col=0):
         self.id = id_
         self.value = value
+        self.line = line
+        self.col = col
 
     def __str__(self):
         """Generate a string representation of the Token using some reflective
@@ -81,13 +99,110 @@ class Token:
         return self.__str__()
 
 
-def remove_tokens(token_input: List[Token], token_id):
+# Shared token returned for every read past the end of the input
+EOF_TOKEN = Token(TokenType.EOF)
+
+
+class TokenBuffer:
+    """Compact struct-of-arrays token store. Every token is a row over the
+    parallel columns @member types, @member starts, @member lengths and
+    @member lines, its value is sliced lazily out of @member source.
+    @member line_offsets holds the source offset every line starts at.
+    The source is either a str or a bytes-like object (e.g. an mmap), in
+    the latter case offsets are byte offsets.
+    Once interned (\sa Symbols.intern_names) @member symbol_ids holds the
+    @member symbols table id of every NAME token."""
+    __slots__ = ('source', 'types', 'starts', 'lengths', 'lines', 'line_offsets',
+                 'symbols', 'symbol_ids')
+
+    def __init__(self, source: str = '', line_offsets: array = None):
+        self.source = source
+        self.types = array('H')
+        self.starts = array('I')
+        self.lengths = array('I')
+        self.lines = array('I')
+        self.line_offsets = array('I', [0]) if line_offsets is None else line_offsets
+        self.symbols = None
+        self.symbol_ids = None
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        """Materializes the token at @param index as a @class Token view."""
+        start = self.starts[index]
+        line = self.lines[index]
+        id_ = self.types[index]
+        if id_ == TokenType.NAME and self.symbols is not None:
+            value = self.symbols.names[self.symbol_ids[index]]
+        else:
+            value = self.source[start:start + self.lengths[index]]
+        return Token(
+            id_,
+            value if type(value) is str else value.decode(),
+            line,
+            start - self.line_offsets[line],
+        )
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self[index]
+
+    def append(self, id_: int, start: int, length: int, line: int):
+        self.types.append(id_)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.lines.append(line)
+
+    def value(self, index: int) -> str:
+        """Returns the source slice of the token at @param index, byte
+        sources (\sa AstroFile.memory_map) are decoded on the fly."""
+        start = self.starts[index]
+        value = self.source[start:start + self.lengths[index]]
+        return value if type(value) is str else value.decode()
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_offsets)
+
+    def line_span(self, line: int) -> tuple:
+        """Returns the (first, stop) token index range of the given line."""
+        return bisect_left(self.lines, line), bisect_left(self.lines, line + 1)
+
+    def line_tokens(self, line: int) -> List[Token]:
+        """Materializes the tokens of a single line."""
+        first, stop = self.line_span(line)
+        return [self[index] for index in range(first, stop)]
+
+    def split_lines(self) -> List[List[Token]]:
+        """Materializes the whole buffer in the List[List[Token]] (per line)
+        format, should only be used for debugging purposes."""
+        return [self.line_tokens(line) for line in range(self.line_count)]
+
+    def without(self, token_id: int) -> 'TokenBuffer':
+        """Returns a new buffer over the same source, without the tokens
+        of type @param token_id."""
+        keep = [id_ != token_id for id_ in self.types]
+        buffer = TokenBuffer(self.source, self.line_offsets)
+        buffer.types = array('H', compress(self.types, keep))
+        buffer.starts = array('I', compress(self.starts, keep))
+        buffer.lengths = array('I', compress(self.lengths, keep))
+        buffer.lines = array('I', compress(self.lines, keep))
+        if self.symbols is not None:
+            buffer.symbols = self.symbols
+            buffer.symbol_ids = array('I', compress(self.symbol_ids, keep))
+        return buffer
+
+
+def remove_tokens(token_input: List[Token] | TokenBuffer, token_id):
     '''Removes all tokens with given token id from the token_input & returns.
-    Then returns the new List[Token]. Note: Function assumes that token_input
-    is format: List[Token].'''
+    Then returns the new List[Token] (or TokenBuffer, if one was passed).'''
+    if isinstance(token_input, TokenBuffer):
+        return token_input.without(token_id)
+
     new_list = []
     for i, token in enumerate(token_input):
         if token.id != token_id:
             new_list.append(token_input[i])
 
-    return new_list
\ No newline at end of file
+    return new_list
@@ -10,21 +10,47 @@ __author__  = 'xyLotus'
 # Imports
 # ===================================
 from typing import Any, AnyStr
-import inspect
+from collections import deque
+from operator import attrgetter
 import sys
+import os
 
-try:
-    from colorama import Fore, Style
-    import colorama
-except ImportError as e:
-    print(f'[utils] - {e}')
-    exit(1)
 
+class _PlainStyle:
+    '''Stand-in for colorama's Fore & Style, every color code is empty, so
+    output that doesn't go to a terminal stays plain text.'''
+    CYAN = YELLOW = RED = WHITE = RESET_ALL = ''
 
-# Yeah, yeah I know it's code that gets auto-run upon importing,
-# but I have better things to do, so I'm just gonna leave this here. Bye.
-if sys.platform == 'win32':
+
+# Color codes used by the formatters below, \sa use_colors
+Fore = Style = _PlainStyle
+
+
+def use_colors(enabled: bool | None = None) -> bool:
+    '''Switches colored output on/off & returns whether it is on.
+    @param enabled None => only when sys.stdout is a terminal (and $NO_COLOR
+                   isn't set). colorama is only imported when colors are on,
+                   plain output is kept if it isn't installed.'''
+    global Fore, Style
+    if enabled is None:
+        enabled = not os.environ.get('NO_COLOR') and sys.stdout.isatty()
+
+    Fore = Style = _PlainStyle
+    if not enabled:
+        return False
+    try:
+        import colorama
+    except ImportError:
+        return False
+
+    # Windows terminals need the ANSI codes translated
+    if sys.platform == 'win32':
         colorama.init()
+    Fore, Style = colorama.Fore, colorama.Style
+    return True
+
+
+use_colors()
 
 class ColorFormat:
     '''Acts as a singleton container (at most) for clored Astro-style text.
@@ -79,35 +105,122 @@ def colored_out(text_format, *args):
 
 
 class ClassUtils:
-    '''Automatically inherits a auto-adjusting __str__ and __repr__ method.'''
+    '''Automatically inherits a auto-adjusting __str__ and __repr__ method.
+    Classes declaring __slots__ get a repr of their field values, the format
+    of which is generated once per class (\sa _repr_format).'''
+    __slots__ = ()
+
     def __str__(self):
-        '''Uses reflection (__dict__) attribute to return the class name and
-        inspect to get the class parameters.'''
-        class_name = self.__class__.__name__
-        class_args = inspect.signature(self.__init__)
-        return f'{class_name}{class_args}'
+        '''Returns the class name and its field values (slotted classes) or
+        the class parameters (taken from the __init__ signature, once).'''
+        cls = self.__class__
+        fmt = _REPR_FORMATS.get(cls)
+        if fmt is None:
+            fmt = _REPR_FORMATS[cls] = _repr_format(cls)
+
+        template, fields = fmt
+        if fields is None:
+            return template
+        return template.format(*fields(self))
 
     def __repr__(self):
         return self.__str__()
 
 
+# Per-class (template, field getter) cache, \sa ClassUtils.__str__
+_REPR_FORMATS = {}
+
+
+def _repr_format(cls) -> tuple:
+    '''Builds the repr template of @param cls. Slotted classes get a
+    "Name(field={!r}, ...)" template filled by an attrgetter, others the
+    constant "Name(signature)" string.'''
+    slotted = all('__slots__' in klass.__dict__ for klass in cls.__mro__[:-1])
+    fields = [
+        name for klass in reversed(cls.__mro__)
+        for name in klass.__dict__.get('__slots__', ())
+    ]
+    if slotted and fields:
+        template = cls.__name__ + '(' + ', '.join(f'{name}={{!r}}' for name in fields) + ')'
+        getter = attrgetter(*fields)
+        return template, (lambda obj: (getter(obj),)) if len(fields) == 1 else getter
+
+    import inspect  # only needed for unslotted classes
+    return f'{cls.__name__}{inspect.signature(cls.__init__)}', None
+
+
+class StreamSink:
+    '''Log sink writing colored lines to a text stream,
+    the stream defaults to the *current* sys.stdout.'''
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def emit(self, src: str | None, msg: str):
+        tag = f'[{src}-Log]' if src is not None else '[Log]'
+        print(f'{Fore.CYAN}{tag}{Fore.WHITE} - {msg}{Style.RESET_ALL}',
+              file=self.stream or sys.stdout)
+
+
+class FileSink:
+    '''Log sink writing plain lines through a buffered file,
+    call close() (or flush()) to get everything onto disk.'''
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        self.file = open(path, 'w', buffering=buffer_size)
+
+    def emit(self, src: str | None, msg: str):
+        tag = f'[{src}-Log]' if src is not None else '[Log]'
+        self.file.write(f'{tag} - {msg}\n')
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class RingSink:
+    '''In-memory log sink only keeping the last @param capacity records,
+    intended for trace-level debugging without any output cost.'''
+    def __init__(self, capacity: int = 1024):
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, src: str | None, msg: str):
+        self.records.append((src, msg))
+
+    def dump(self, stream=None):
+        '''Writes the kept records (oldest first) in plain text.'''
+        for src, msg in self.records:
+            tag = f'[{src}-Log]' if src is not None else '[Log]'
+            print(f'{tag} - {msg}', file=stream or sys.stdout)
+
+
 class LogOutput:
     '''Manages Log output with a level-based importance system.
     Note: Intended level use => The lower the level (1 being the lowest),
           the higher the priority of it. Can also be a list for multiple levels
-          of output.'''
-    def __init__(self, levels: list):
+          of output.
+    Messages are only formatted once their level is enabled, pass the
+    arguments separately (str.format style) instead of using an f-string.
+    Hot paths should hoist @method enabled out of their loops.'''
+    def __init__(self, levels: list, sink=None):
         '''Parameters:
         @level: Dev-mutable level of output importance.
-                All func calls with given level will output.'''
-        self.levels = levels
+                All func calls with given level will output.
+        @sink:  Receives the enabled records (StreamSink, FileSink, RingSink
+                or anything with an emit(src, msg) method), StreamSink by default.'''
+        self.levels = frozenset(levels)
+        self.sink = sink if sink is not None else StreamSink()
+
+    def enabled(self, lvl: int) -> bool:
+        '''Returns whether messages of the given level are output at all.'''
+        return lvl in self.levels
 
-    def src_log(self, lvl: int, src: str, msg: str):
+    def src_log(self, lvl: int, src: str, msg: str, *args):
         '''ColorFormat.src_log wrapper with level importance sys implemented.'''
         if lvl in self.levels:
-            print(f'{Fore.CYAN}[{src}-Log]{Fore.WHITE} - {msg}{Style.RESET_ALL}')
+            self.sink.emit(src, msg.format(*args) if args else msg)
 
-    def log(self, lvl: int, msg: str):
+    def log(self, lvl: int, msg: str, *args):
         '''ColorFormat.log wrapper with level importance sys implemented.'''
         if lvl in self.levels:
-            print(f'{Fore.CYAN}[Log]{Fore.WHITE} - {msg}{Style.RESET_ALL}')
\ No newline at end of file
+            self.sink.emit(None, msg.format(*args) if args else msg)
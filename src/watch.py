@@ -0,0 +1,212 @@
+# ===================================
+# - Official Astro Source Code -
+# ===================================
+'''Contains the watch mode (\sa __main__ --watch), which keeps the compile
+results of a source tree in memory and, on changes, only recompiles the
+files whose content actually changed.'''
+# ===================================
+# Dunder Credentials
+# ===================================
+__author__  = 'xyLotus'
+__version__ = '0.1'
+# ===================================
+# Imports
+# ===================================
+from typing import Callable, Iterable, List, NamedTuple, Tuple
+from driver import CompileResult, collect_sources, compile_many
+import hashlib
+import select
+import time
+import sys
+import os
+
+
+class WatchCycle(NamedTuple):
+    '''Outcome of a single rebuild, \sa Watcher.rebuild.
+    @member changed   files whose stats changed (incl. added ones)
+    @member compiled  results of the files that got recompiled
+    @member unchanged files that changed on disk but not in content
+    @member removed   files that are gone'''
+    changed: List[str]
+    compiled: List[CompileResult]
+    unchanged: List[str]
+    removed: List[str]
+    seconds: float
+
+
+class _PollWaker:
+    '''Change notification fallback, simply waits for the poll interval.'''
+    def watch(self, directories: Iterable[str]):
+        pass
+
+    def wait(self, timeout: float) -> bool:
+        time.sleep(timeout)
+        return True
+
+    def close(self):
+        pass
+
+
+class _InotifyWaker:
+    '''Wakes the watcher up as soon as the kernel reports a change in one
+    of the watched directories (Linux inotify through libc), so there's no
+    need for short poll intervals. Events only wake the watcher up, what
+    changed is still decided by @method Watcher.scan.'''
+    _MASK = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200  # modify, close_write, moved, create, delete
+    _NONBLOCK = os.O_NONBLOCK
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(self._NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._watched = set()
+
+    def watch(self, directories: Iterable[str]):
+        for directory in directories:
+            if directory in self._watched:
+                continue
+            if self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self._MASK) >= 0:
+                self._watched.add(directory)
+
+    def wait(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self._fd, 1 << 16):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self._fd)
+
+
+def _make_waker(use_inotify: bool):
+    if use_inotify and sys.platform.startswith('linux'):
+        try:
+            return _InotifyWaker()
+        except (OSError, AttributeError):
+            pass  # no inotify (e.g. limits reached), polling still works
+    return _PollWaker()
+
+
+def content_hash(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).digest()
+
+
+class Watcher:
+    '''Watches @member targets (files, directories & glob patterns, \sa
+    driver.py@collect_sources), every file is (re)compiled only if its
+    content hash changed since its last compile.
+    @member stats   path => (mtime_ns, size) as of the last scan
+    @member hashes  path => content hash of the last compile
+    @member results path => last CompileResult'''
+    def __init__(self, targets: List[str], workers: int = None, cache_dir: str = None,
+                 memory_map: bool = False, interval: float = 0.5, debounce: float = 0.2,
+                 use_inotify: bool = True):
+        '''@param interval seconds between scans (upper bound with inotify)
+        @param debounce  changes are only compiled once the tree has been
+                         quiet for this long, bursts (checkouts, editors
+                         writing several files) are compiled at once'''
+        self.targets = targets
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.memory_map = memory_map
+        self.interval = interval
+        self.debounce = debounce
+        self.stats = {}
+        self.hashes = {}
+        self.results = {}
+        self._waker = _make_waker(use_inotify)
+
+    def scan(self) -> Tuple[List[str], List[str]]:
+        '''Stats all sources, returns the (changed or added, removed) paths
+        and updates @member stats.'''
+        stats = {}
+        for path in collect_sources(self.targets):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (st.st_mtime_ns, st.st_size)
+
+        changed = [path for path, stat in stats.items() if self.stats.get(path) != stat]
+        removed = [path for path in self.stats if path not in stats]
+        self.stats = stats
+        self._waker.watch(self._directories())
+        return changed, removed
+
+    def _directories(self) -> set:
+        directories = {os.path.dirname(os.path.abspath(path)) for path in self.stats}
+        for target in self.targets:
+            if os.path.isdir(target):
+                for root, _, _ in os.walk(target):
+                    directories.add(os.path.abspath(root))
+        return directories
+
+    def rebuild(self, changed: List[str], removed: List[str]) -> WatchCycle:
+        '''Recompiles those @param changed files whose content hash changed,
+        results of everything else are kept.'''
+        start = time.perf_counter()
+        for path in removed:
+            self.hashes.pop(path, None)
+            self.results.pop(path, None)
+
+        stale, unchanged, hashes = [], [], {}
+        for path in changed:
+            try:
+                digest = content_hash(path)
+            except OSError:
+                continue  # removed in the meantime, the next scan drops it
+            if self.hashes.get(path) == digest and path in self.results:
+                unchanged.append(path)
+            else:
+                stale.append(path)
+                hashes[path] = digest
+
+        compiled = compile_many(stale, workers=self.workers, cache_dir=self.cache_dir,
+                                memory_map=self.memory_map) if stale else []
+        for result in compiled:
+            self.results[result.path] = result
+            self.hashes[result.path] = hashes[result.path]
+        return WatchCycle(changed, compiled, unchanged, removed, time.perf_counter() - start)
+
+    def wait_for_changes(self) -> Tuple[List[str], List[str]]:
+        '''Blocks until files changed, then until the changes settled for
+        @member debounce seconds, returns all of them at once.'''
+        while True:
+            self._waker.wait(self.interval)
+            changed, removed = self.scan()
+            if changed or removed:
+                break
+
+        changed, removed = set(changed), set(removed)
+        while True:
+            time.sleep(self.debounce)
+            more_changed, more_removed = self.scan()
+            if not (more_changed or more_removed):
+                break
+            changed.update(more_changed)
+            removed.update(more_removed)
+            changed.difference_update(more_removed)
+            removed.difference_update(more_changed)
+        return sorted(changed & self.stats.keys()), sorted(removed - self.stats.keys())
+
+    def run(self, report: Callable[[WatchCycle, 'Watcher'], None], cycles: int = None):
+        '''Compiles everything, then recompiles on every change and passes
+        each cycle to @param report until interrupted (or after @param cycles
+        rebuilds, the initial one included).'''
+        try:
+            report(self.rebuild(*self.scan()), self)
+            done = 1
+            while cycles is None or done < cycles:
+                report(self.rebuild(*self.wait_for_changes()), self)
+                done += 1
+        finally:
+            self._waker.close()